@@ -1,10 +1,13 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import issues, login, maintenance, users, vines
+from app.api.api_v1.endpoints import imports, issues, login, maintenance, metrics, stats, users, vines
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(vines.router, prefix="/vines", tags=["vines"])
 api_router.include_router(maintenance.router, prefix="/maintenance", tags=["maintenance"])
-api_router.include_router(issues.router, prefix="/issues", tags=["issues"])
\ No newline at end of file
+api_router.include_router(issues.router, prefix="/issues", tags=["issues"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
+api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
\ No newline at end of file
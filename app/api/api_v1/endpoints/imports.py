@@ -0,0 +1,122 @@
+import os
+from typing import Any, List, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.crud import crud_import
+from app.models.user import User
+from app.schemas.import_job import ImportJob, ImportJobCreate, ImportJobErrors, ImportKind
+from app.utils import csv_import
+
+router = APIRouter()
+
+
+@router.post("/{kind}", response_model=ImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_import(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    background_tasks: BackgroundTasks,
+    kind: ImportKind,
+    file: UploadFile = File(...),
+    on_conflict: Literal["error", "update"] = "error",
+    atomic: bool = False,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Upload a CSV file of vines, maintenance activities or issues to import.
+    The header is checked straight away; the rows are loaded in the background.
+    Poll GET /imports/{job_id} for progress and read rejected rows from
+    GET /imports/{job_id}/errors.
+    """
+    path = await csv_import.save_upload(file)
+    problems = csv_import.header_problems(kind, path)
+    if problems:
+        os.unlink(path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=problems,
+        )
+
+    job = await crud_import.import_job.create(
+        db,
+        obj_in=ImportJobCreate(
+            kind=kind,
+            filename=file.filename,
+            on_conflict=on_conflict,
+            atomic=atomic,
+            created_by=current_user.id,
+        ),
+    )
+    background_tasks.add_task(csv_import.run_import, job.id, path)
+    return job
+
+
+@router.get("/", response_model=List[ImportJob])
+async def read_imports(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve import jobs, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
+    """
+    jobs = await crud_import.import_job.get_recent(db, limit=limit, cursor=cursor)
+    deps.set_next_cursor(response, crud_import.import_job.recent_keyset.next_cursor(jobs, limit))
+    return jobs
+
+
+@router.get("/{job_id}", response_model=ImportJob)
+async def read_import(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    job_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get an import job: its status and row counts.
+    """
+    job = await crud_import.import_job.get(db, id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found",
+        )
+    return job
+
+
+@router.get("/{job_id}/errors", response_model=ImportJobErrors)
+async def read_import_errors(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    job_id: int,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    The problems found in an import's rows, by row number (the header is row 1).
+    """
+    job = await crud_import.import_job.get(db, id=job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found",
+        )
+    errors = await crud_import.import_job.get_errors(db, job_id=job_id, skip=skip, limit=limit)
+    error_rows = await crud_import.import_job.count_error_rows(db, job_id=job_id)
+    return {"job_id": job_id, "error_rows": error_rows, "errors": errors}
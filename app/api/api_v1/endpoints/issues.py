@@ -1,48 +1,78 @@
 from datetime import datetime
-from typing import Any, List, Optional
+from email.utils import formatdate
+from typing import Any, List, Literal, Optional
 import base64
+import hashlib
+import logging
 import os
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, status, File, UploadFile, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 
 from app.api import deps
 from app.crud import crud_issue, crud_user, crud_vine
 from app.models.user import User
 from app.schemas.issue import Issue, IssueCreate, IssueUpdate, IssueWithDetails, IssueWithPhoto
-from app.utils.image_utils import decode_base64_image, save_uploaded_image, process_uploaded_file, get_full_image_path
+from app.utils.image_utils import (
+    PHOTO_CACHE_REVALIDATE,
+    PHOTO_CACHE_VERSIONED,
+    decode_base64_image,
+    ensure_photo_variant,
+    get_full_image_path,
+    is_not_modified,
+    photo_etag,
+    process_uploaded_file,
+    save_uploaded_image,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Columns the Issue response reads; list queries fetch nothing else
+ISSUE_COLUMNS = crud_issue.issue.schema_columns(Issue)
+
 
 @router.get("/", response_model=List[Issue])
 async def read_issues(
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve issues.
     """
-    issues = await crud_issue.issue.get_multi(db, skip=skip, limit=limit)
+    issues = await crud_issue.issue.get_multi(
+        db, skip=skip, limit=limit, cursor=cursor, columns=ISSUE_COLUMNS
+    )
+    deps.set_next_cursor(response, crud_issue.issue.keyset.next_cursor(issues, limit))
     return issues
 
 
 @router.get("/with-details", response_model=List[IssueWithDetails])
 async def read_issues_with_details(
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve issues with detailed information (user names, vine IDs).
     """
     issues_with_details = await crud_issue.issue.get_multi_with_details(
-        db, skip=skip, limit=limit
+        db, skip=skip, limit=limit, cursor=cursor, columns=ISSUE_COLUMNS
+    )
+    deps.set_next_cursor(
+        response,
+        crud_issue.issue.date_keyset.next_cursor([row[0] for row in issues_with_details], limit),
     )
     
     # Format the data for response
@@ -205,10 +235,12 @@ async def read_issue_with_details(
 @router.get("/vine/{vine_id}", response_model=List[Issue])
 async def read_vine_issues(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     vine_id: int,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -222,25 +254,31 @@ async def read_vine_issues(
             detail="Vine not found",
         )
     
-    issues = await crud_issue.issue.get_by_vine_id(db, vine_id=vine_id, skip=skip, limit=limit)
+    issues = await crud_issue.issue.get_by_vine_id(
+        db, vine_id=vine_id, skip=skip, limit=limit, cursor=cursor, columns=ISSUE_COLUMNS
+    )
+    deps.set_next_cursor(response, crud_issue.issue.date_keyset.next_cursor(issues, limit))
     return issues
 
 
 @router.get("/status/{is_resolved}", response_model=List[Issue])
 async def read_issues_by_status(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     is_resolved: bool,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get issues filtered by resolution status.
     """
     issues = await crud_issue.issue.get_by_status(
-        db, is_resolved=is_resolved, skip=skip, limit=limit
+        db, is_resolved=is_resolved, skip=skip, limit=limit, cursor=cursor, columns=ISSUE_COLUMNS
     )
+    deps.set_next_cursor(response, crud_issue.issue.date_keyset.next_cursor(issues, limit))
     return issues
 
 
@@ -362,6 +400,8 @@ async def update_issue_with_file(
             # Process the photo - this doesn't use the database
             photo_info = await process_uploaded_file(photo)
             print(f"DEBUG: Successfully prepared photo for upload to {photo_info[0]}")
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"ERROR processing photo: {e}")
             import traceback
@@ -462,98 +502,79 @@ async def delete_issue(
 @router.get("/{issue_id}/photo", response_class=Response)
 async def get_issue_photo(
     *,
+    request: Request,
     db: AsyncSession = Depends(deps.get_db),
     issue_id: int,
+    v: Optional[str] = None,
+    size: Literal["thumb", "medium", "full"] = "full",
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get issue photo as image.
+    `size=thumb` or `size=medium` returns a downscaled JPEG, made on first
+    request for photos uploaded before variants existed.
+    Files are streamed by the server (sendfile where it supports it) and
+    honour Range requests. ETag and Last-Modified let clients revalidate
+    with a 304, and the versioned photo_url (`?v=`) can be cached for good.
     """
-    # First get the issue metadata only
-    issue = None
-    photo_path = None
-    photo_content_type = None
-    photo_data = None
+    # Metadata only; the legacy blob is loaded below if there is no file
+    issue = await crud_issue.issue.get(db, id=issue_id)
+    if not issue:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Issue not found",
+        )
+    photo_content_type = issue.photo_content_type or "image/jpeg"
     
-    try:
-        # Get the issue with required fields only to minimize DB interaction time
-        issue = await crud_issue.issue.get(db, id=issue_id)
-        if not issue:
+    if issue.photo_path:
+        served_path = issue.photo_path
+        if size != "full":
+            variant_path = await ensure_photo_variant(issue.photo_path, size)
+            # Photos Pillow can't read (or missing files) are served as they are
+            if variant_path is not None:
+                served_path, photo_content_type = variant_path, "image/jpeg"
+        file_path = get_full_image_path(served_path)
+        try:
+            stat_result = await run_in_threadpool(os.stat, file_path)
+        except OSError:
+            # Fall back to the database blob if there is one
+            logger.warning(f"Photo file missing for issue {issue_id}: {file_path}")
+            stat_result = None
+        if stat_result is not None:
+            headers = {
+                "ETag": photo_etag(served_path, stat_result),
+                "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+                "Cache-Control": PHOTO_CACHE_VERSIONED if v and v == issue.photo_version else PHOTO_CACHE_REVALIDATE,
+            }
+            if is_not_modified(request.headers, headers["ETag"], stat_result.st_mtime):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return FileResponse(
+                file_path, media_type=photo_content_type, stat_result=stat_result, headers=headers
+            )
+    
+    # Fall back to the database blob if available
+    issue = await crud_issue.issue.get_with_photo(db, id=issue_id)
+    photo_data = issue.photo_data if issue else None
+    if photo_data:
+        # Validate photo data
+        if len(photo_data) < 10:  # Arbitrary small size that's unlikely for a real image
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Issue not found",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Photo data appears to be corrupt or incomplete",
             )
-        
-        # Store the photo information and close the database connection as soon as possible
-        photo_path = issue.photo_path
-        photo_content_type = issue.photo_content_type or "image/jpeg"
-        photo_data = issue.photo_data
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        print(f"ERROR retrieving issue metadata: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving issue metadata: {str(e)}",
-        )
+        headers = {
+            "ETag": f'"{hashlib.sha1(photo_data).hexdigest()}"',
+            "Cache-Control": PHOTO_CACHE_REVALIDATE,
+        }
+        if is_not_modified(request.headers, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=photo_data, media_type=photo_content_type, headers=headers)
     
-    # Now process the file outside the database transaction
-    try:
-        from pathlib import Path
-        from app.utils.image_utils import get_full_image_path
-        import os
-        
-        # Try to serve the file from disk first
-        if photo_path:
-            try:
-                # Construct the full path to the image file
-                file_path = get_full_image_path(photo_path)
-                
-                print(f"DEBUG: Attempting to read image file from: {file_path}")
-                
-                # Check if the file exists
-                if os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        file_content = f.read()
-                    
-                    print(f"DEBUG: Successfully read image file from disk: {len(file_content)} bytes")
-                    return Response(content=file_content, media_type=photo_content_type)
-            except Exception as e:
-                print(f"ERROR reading image file from disk: {str(e)}")
-                # If file read fails, we'll fall back to the database blob if available
-        
-        # Fall back to the database blob if available
-        if photo_data:
-            # Validate photo data
-            if len(photo_data) < 10:  # Arbitrary small size that's unlikely for a real image
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Photo data appears to be corrupt or incomplete",
-                )
-            
-            return Response(content=photo_data, media_type=photo_content_type)
-        
-        # If we get here, no photo is available
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No photo available for this issue",
-        )
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        # Handle any other exceptions
-        print(f"ERROR retrieving photo: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving photo: {str(e)}",
-        )
+    # If we get here, no photo is available
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="No photo available for this issue",
+    )
 
 
 @router.post("/upload", response_model=Issue)
@@ -606,16 +627,6 @@ async def create_issue_with_file(
         print(f"DEBUG: Photo details:")
         print(f"DEBUG: filename: {photo.filename}")
         print(f"DEBUG: content_type: {photo.content_type}")
-        try:
-            size = 0
-            chunk = await photo.read(1024)
-            while chunk:
-                size += len(chunk)
-                chunk = await photo.read(1024)
-            await photo.seek(0)  # Reset file pointer to beginning
-            print(f"DEBUG: file size: {size} bytes")
-        except Exception as e:
-            print(f"DEBUG: Error reading photo size: {e}")
     else:
         print(f"DEBUG: No photo provided")
     
@@ -629,6 +640,8 @@ async def create_issue_with_file(
             # Process the photo - this doesn't use the database
             photo_info = await process_uploaded_file(photo)
             print(f"DEBUG: Successfully prepared photo for upload to {photo_info[0]}")
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"ERROR processing photo: {e}")
             import traceback
@@ -708,7 +721,7 @@ async def read_issue_with_photo(
     Get issue with photo data in base64 format.
     """
     try:
-        issue = await crud_issue.issue.get(db, id=issue_id)
+        issue = await crud_issue.issue.get_with_photo(db, id=issue_id)
         if not issue:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
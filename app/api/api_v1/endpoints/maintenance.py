@@ -1,6 +1,6 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
@@ -22,15 +22,20 @@ router = APIRouter()
 # Maintenance Type endpoints
 @router.get("/types", response_model=List[MaintenanceType])
 async def read_maintenance_types(
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve maintenance types.
     """
-    types = await crud_maintenance.maintenance_type.get_multi(db, skip=skip, limit=limit)
+    types = await crud_maintenance.maintenance_type.get_multi(
+        db, skip=skip, limit=limit, cursor=cursor
+    )
+    deps.set_next_cursor(response, crud_maintenance.maintenance_type.keyset.next_cursor(types, limit))
     return types
 
 
@@ -118,28 +123,34 @@ async def delete_maintenance_type(
     """
     Delete a maintenance type.
     """
-    maintenance_type = await crud_maintenance.maintenance_type.get(db, id=type_id)
+    maintenance_type = await crud_maintenance.maintenance_type.remove(db, id=type_id)
     if not maintenance_type:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Maintenance type not found",
         )
-    maintenance_type = await crud_maintenance.maintenance_type.remove(db, id=type_id)
     return maintenance_type
 
 
 # Maintenance Activity endpoints
 @router.get("/activities", response_model=List[MaintenanceActivity])
 async def read_maintenance_activities(
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve maintenance activities.
     """
-    activities = await crud_maintenance.maintenance_activity.get_multi(db, skip=skip, limit=limit)
+    activities = await crud_maintenance.maintenance_activity.get_multi(
+        db, skip=skip, limit=limit, cursor=cursor
+    )
+    deps.set_next_cursor(
+        response, crud_maintenance.maintenance_activity.keyset.next_cursor(activities, limit)
+    )
     return activities
 
 
@@ -195,10 +206,12 @@ async def read_maintenance_activity(
 @router.get("/activities/vine/{vine_id}", response_model=List[MaintenanceActivityWithType])
 async def read_vine_maintenance_activities(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     vine_id: int,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -213,7 +226,10 @@ async def read_vine_maintenance_activities(
         )
     
     activities = await crud_maintenance.maintenance_activity.get_by_vine_id(
-        db, vine_id=vine_id, skip=skip, limit=limit
+        db, vine_id=vine_id, skip=skip, limit=limit, cursor=cursor
+    )
+    deps.set_next_cursor(
+        response, crud_maintenance.maintenance_activity.date_keyset.next_cursor(activities, limit)
     )
     return activities
 
@@ -229,13 +245,6 @@ async def update_maintenance_activity(
     """
     Update a maintenance activity.
     """
-    activity = await crud_maintenance.maintenance_activity.get(db, id=activity_id)
-    if not activity:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Maintenance activity not found",
-        )
-    
     # Check if maintenance type exists if being updated
     if activity_in.type_id:
         maintenance_type = await crud_maintenance.maintenance_type.get(db, id=activity_in.type_id)
@@ -245,9 +254,14 @@ async def update_maintenance_activity(
                 detail="Maintenance type not found",
             )
     
-    activity = await crud_maintenance.maintenance_activity.update(
-        db, db_obj=activity, obj_in=activity_in
+    activity = await crud_maintenance.maintenance_activity.update_by_id(
+        db, id=activity_id, obj_in=activity_in
     )
+    if not activity:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Maintenance activity not found",
+        )
     return activity
 
 
@@ -261,11 +275,10 @@ async def delete_maintenance_activity(
     """
     Delete a maintenance activity.
     """
-    activity = await crud_maintenance.maintenance_activity.get(db, id=activity_id)
+    activity = await crud_maintenance.maintenance_activity.remove(db, id=activity_id)
     if not activity:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Maintenance activity not found",
         )
-    activity = await crud_maintenance.maintenance_activity.remove(db, id=activity_id)
     return activity
\ No newline at end of file
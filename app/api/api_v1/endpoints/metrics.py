@@ -0,0 +1,53 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.api import deps
+from app.core.cache import registry as cache_registry
+from app.core.workers import registry as worker_pool_registry
+from app.db.pool import pool_status
+from app.db.session import replica_status
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.get("/caches", response_model=Dict[str, Any])
+async def read_cache_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Size, hit rate and eviction counters for every in-process cache.
+    """
+    return {name: cache.stats() for name, cache in cache_registry.items()}
+
+
+@router.get("/workers", response_model=Dict[str, Any])
+async def read_worker_pool_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Concurrency and queue depth for the worker pools used for CPU-heavy work.
+    """
+    return {name: pool.stats() for name, pool in worker_pool_registry.items()}
+
+
+@router.get("/db-pool", response_model=Dict[str, Any])
+async def read_db_pool_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Connection pool occupancy, overflow use, checkout wait times and
+    connection hold times per route.
+    """
+    return pool_status()
+
+
+@router.get("/db-replica", response_model=Dict[str, Any])
+async def read_db_replica_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Read replica health and lag as of the last check.
+    """
+    return replica_status()
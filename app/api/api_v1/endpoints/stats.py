@@ -0,0 +1,152 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.crud.crud_stats import VINE_COUNT_VIEWS, stats, stats_refresher
+from app.models.user import User
+from app.schemas.stats import (
+    ActivitiesInMonth,
+    MortalityStats,
+    OpenIssuesByField,
+    StatsResponse,
+    StatsStatus,
+    VineCountsByField,
+    VineCountsByPlantingYear,
+    VineCountsByRootstock,
+    VineCountsByVariety,
+)
+
+router = APIRouter()
+
+
+async def _vine_counts(db: AsyncSession, by: str) -> Any:
+    view_name, _ = VINE_COUNT_VIEWS[by]
+    return {
+        "refreshed_at": await stats.refreshed_at(db, view_name),
+        "items": await stats.vine_counts(db, by=by),
+    }
+
+
+@router.get("/vines/by-variety", response_model=StatsResponse[VineCountsByVariety])
+async def read_vines_by_variety(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Vine counts (total, alive, dead) per variety.
+    """
+    return await _vine_counts(db, "variety")
+
+
+@router.get("/vines/by-rootstock", response_model=StatsResponse[VineCountsByRootstock])
+async def read_vines_by_rootstock(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Vine counts (total, alive, dead) per rootstock.
+    """
+    return await _vine_counts(db, "rootstock")
+
+
+@router.get("/vines/by-field", response_model=StatsResponse[VineCountsByField])
+async def read_vines_by_field(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Vine counts (total, alive, dead) per vineyard field.
+    """
+    return await _vine_counts(db, "field")
+
+
+@router.get("/vines/by-planting-year", response_model=StatsResponse[VineCountsByPlantingYear])
+async def read_vines_by_planting_year(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Vine counts (total, alive, dead) per year of planting.
+    """
+    return await _vine_counts(db, "planting_year")
+
+
+@router.get("/mortality", response_model=MortalityStats)
+async def read_mortality(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Dead vines overall, and deaths per month by date_died.
+    """
+    totals = await stats.vine_totals(db)
+    return {
+        "refreshed_at": await stats.refreshed_at(db, "stats_vines_by_field", "stats_deaths_by_month"),
+        **totals,
+        "mortality_rate": round(totals["dead"] / totals["total"], 4) if totals["total"] else None,
+        "deaths_by_month": await stats.deaths_by_month(db),
+    }
+
+
+@router.get("/issues/open-by-field", response_model=StatsResponse[OpenIssuesByField])
+async def read_open_issues_by_field(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Unresolved issues per vineyard field, and how many vines they affect.
+    """
+    return {
+        "refreshed_at": await stats.refreshed_at(db, "stats_open_issues_by_field"),
+        "items": await stats.open_issues_by_field(db),
+    }
+
+
+@router.get("/activities/by-type-month", response_model=StatsResponse[ActivitiesInMonth])
+async def read_activities_by_type_month(
+    db: AsyncSession = Depends(deps.get_read_db),
+    months: int = Query(12, ge=1, le=120),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Maintenance activities per type per month, for the last `months` months.
+    """
+    return {
+        "refreshed_at": await stats.refreshed_at(db, "stats_activities_by_type_month"),
+        "items": await stats.activities_by_type_month(db, months=months),
+    }
+
+
+@router.get("/status", response_model=StatsStatus)
+async def read_stats_status(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    When each stats view was last refreshed, and which are waiting for a refresh.
+    """
+    return {
+        "views": await stats.refresh_status(db),
+        "pending": sorted(stats_refresher.pending),
+    }
+
+
+@router.post("/refresh", response_model=StatsStatus)
+async def refresh_stats(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Refresh every stats view now, rather than waiting for the next write.
+    """
+    if not await stats_refresher.refresh():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A stats refresh is already running",
+        )
+    return {
+        "views": await stats.refresh_status(db),
+        "pending": sorted(stats_refresher.pending),
+    }
@@ -1,6 +1,6 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
 from fastapi.encoders import jsonable_encoder
 from pydantic import EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -17,15 +17,18 @@ router = APIRouter()
 
 @router.get("/", response_model=List[UserSchema])
 async def read_users(
+    response: Response,
     db: AsyncSession = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Retrieve users.
     """
-    users = await crud_user.user.get_multi(db, skip=skip, limit=limit)
+    users = await crud_user.user.get_multi(db, skip=skip, limit=limit, cursor=cursor)
+    deps.set_next_cursor(response, crud_user.user.keyset.next_cursor(users, limit))
     return users
 
 
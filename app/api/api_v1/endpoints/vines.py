@@ -1,47 +1,86 @@
-from typing import Any, Dict, List
+import csv
+import io
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Literal, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.core.config import settings
 from app.crud import crud_vine
+from app.db.session import export_session
 from app.models.user import User
-from app.schemas.vine import Vine, VineCreate, VineSearchParams, VineUpdate
+from app.schemas.vine import (
+    Vine,
+    VineBulkUpdate,
+    VineBulkUpdateResult,
+    VineChanges,
+    VineCreate,
+    VineFieldLayout,
+    VineFilters,
+    VineSearchParams,
+    VineSyncBatchResult,
+    VineUpdate,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# SQLSTATE Postgres reports for a unique index violation
+UNIQUE_VIOLATION = "23505"
+
 
 @router.get("/", response_model=List[Vine])
 async def read_vines(
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve all vines.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    vines = await crud_vine.vine.get_multi(db, skip=skip, limit=limit)
+    vines = await crud_vine.vine.get_multi(db, skip=skip, limit=limit, cursor=cursor)
+    deps.set_next_cursor(response, crud_vine.vine.keyset.next_cursor(vines, limit))
     return vines
 
 
 @router.post("/search", response_model=Dict[str, Any])
 async def search_vines(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     params: VineSearchParams,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Search vines with filters and pagination.
+    `count_mode` in the response says whether `total` is exact, a planner
+    estimate, or skipped ("none", when include_total is false).
     """
-    vines, total = await crud_vine.vine.search(db, params=params)
+    page = await crud_vine.vine.search(db, params=params)
     return {
-        "items": vines,
-        "total": total,
+        "items": page.items,
+        "total": page.total,
         "page": params.page,
         "items_per_page": params.items_per_page,
-        "pages": (total + params.items_per_page - 1) // params.items_per_page,
+        "pages": (
+            (page.total + params.items_per_page - 1) // params.items_per_page
+            if page.total is not None
+            else None
+        ),
+        "has_next": page.has_next,
+        "count_mode": page.count_mode,
     }
 
 
@@ -55,14 +94,23 @@ async def create_vine(
     """
     Create new vine.
     """
-    # Check if vine with this ID already exists
-    existing_vine = await crud_vine.vine.get_by_alpha_id(db, alpha_id=vine_in.alpha_numeric_id)
-    if existing_vine:
+    # Let the unique index reject duplicates instead of checking first
+    try:
+        vine = await crud_vine.vine.create(db, obj_in=vine_in)
+    except IntegrityError as e:
+        await db.rollback()
+        # alpha_numeric_id is the vine table's only unique index besides the primary key
+        if getattr(e.orig, "sqlstate", None) == UNIQUE_VIOLATION:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Vine with ID {vine_in.alpha_numeric_id} already exists",
+            )
+        # NOT NULL and foreign key violations are bad input, not a duplicate
+        message = str(getattr(e, "orig", e)).strip().splitlines()[0]
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Vine with ID {vine_in.alpha_numeric_id} already exists",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Vine breaks a database constraint: {message}",
         )
-    vine = await crud_vine.vine.create(db, obj_in=vine_in)
     return vine
 
 
@@ -80,6 +128,197 @@ async def sync_vine(
     return vine
 
 
+@router.get("/changes", response_model=VineChanges)
+async def read_vine_changes(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Vines created, updated or deleted since a cursor (for offline mobile clients).
+    Omit `since` for a full download, then pass `next_cursor` on every later poll;
+    keep polling while `has_more` is true. Changes from transactions still in
+    progress are held back until they finish.
+    """
+    page = await crud_vine.vine.get_changes(db, since=since, limit=limit)
+    return {
+        "changed": page.changed,
+        "deleted": [
+            {"id": d.vine_id, "alpha_numeric_id": d.alpha_numeric_id, "deleted_at": d.deleted_at}
+            for d in page.deleted
+        ],
+        "next_cursor": page.next_cursor,
+        "has_more": page.has_more,
+    }
+
+
+@router.post("/sync/batch", response_model=VineSyncBatchResult)
+async def sync_vines_batch(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    vines_in: List[VineCreate],
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Create or update many vines at once (for mobile app syncing).
+    Items are upserted by alpha_numeric_id in chunks; each result reports
+    whether the vine was created, updated, or failed.
+    """
+    if len(vines_in) > settings.VINE_SYNC_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.VINE_SYNC_MAX_BATCH} vines can be synced per request",
+        )
+    
+    started_at = time.perf_counter()
+    results = await crud_vine.vine.sync_batch(
+        db, items=vines_in, chunk_size=settings.VINE_SYNC_CHUNK_SIZE
+    )
+    elapsed = time.perf_counter() - started_at
+    
+    counts = Counter(result["status"] for result in results)
+    items_per_second = len(vines_in) / elapsed if elapsed > 0 else 0.0
+    if len(vines_in) >= settings.VINE_SYNC_CHUNK_SIZE:
+        logger.info(
+            f"Vine batch sync: {len(vines_in)} items in {elapsed * 1000:.0f} ms "
+            f"({items_per_second:.0f} items/s, {counts['error']} failed)"
+        )
+    return {
+        "results": results,
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "failed": counts["error"],
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "items_per_second": round(items_per_second, 1),
+    }
+
+
+@router.patch("/bulk", response_model=VineBulkUpdateResult)
+async def bulk_update_vines(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    bulk_in: VineBulkUpdate,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Apply the same change to many vines at once, selected either by `ids` or
+    by search `filters`. With `dry_run` the matching vines are only counted.
+    Nothing changes if more than `max_affected` vines match.
+    """
+    if (bulk_in.ids is None) == (bulk_in.filters is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Select vines with either ids or filters",
+        )
+    max_rows = settings.VINE_BULK_MAX_ROWS
+    if bulk_in.ids is not None and len(bulk_in.ids) > max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {max_rows} vines can be updated per request",
+        )
+    patch = bulk_in.patch.model_dump(exclude_unset=True)
+    if not patch:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The patch has no fields to update",
+        )
+    if "alpha_numeric_id" in patch:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="alpha_numeric_id is unique and can't be bulk updated",
+        )
+    
+    max_affected = min(bulk_in.max_affected or max_rows, max_rows)
+    try:
+        result = await crud_vine.vine.bulk_update(
+            db,
+            ids=bulk_in.ids,
+            filters=bulk_in.filters,
+            obj_in=patch,
+            max_affected=max_affected,
+            dry_run=bulk_in.dry_run,
+        )
+    except crud_vine.TooManyVines as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{e}; nothing was updated",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The patch breaks a database constraint; nothing was updated",
+        )
+    return {"matched": result.matched, "dry_run": bulk_in.dry_run, "updated_ids": result.updated_ids}
+
+
+# Export columns: the id, then the rest of the Vine schema in order
+EXPORT_COLUMNS = ["id"] + [name for name in Vine.model_fields if name != "id"]
+
+
+def _export_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_chunk(rows: Sequence[Any], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([_export_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def _ndjson_chunk(rows: Sequence[Any]) -> str:
+    return "".join(
+        json.dumps({column: _export_value(value) for column, value in zip(EXPORT_COLUMNS, row)}) + "\n"
+        for row in rows
+    )
+
+
+async def _export_rows(
+    request: Request, filters: VineFilters, export_format: str
+) -> AsyncGenerator[str, None]:
+    if export_format == "csv":
+        yield _csv_chunk([], header=True)
+    try:
+        async with export_session(request) as db:
+            async for rows in crud_vine.vine.stream_rows(
+                db, params=filters, columns=EXPORT_COLUMNS, batch_size=settings.EXPORT_BATCH_SIZE
+            ):
+                yield _csv_chunk(rows) if export_format == "csv" else _ndjson_chunk(rows)
+    except Exception as e:
+        # The status line has already been sent, so all we can do is cut the body short
+        logger.error(f"Vine export failed mid-stream: {str(e)}")
+        raise
+
+
+@router.get("/export")
+async def export_vines(
+    *,
+    request: Request,
+    filters: VineFilters = Depends(),
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Download every vine matching the filters (the same ones as /search) as CSV
+    or NDJSON. Rows are streamed from a server-side cursor, so the size of the
+    export doesn't affect memory use.
+    """
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"vines-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        _export_rows(request, filters, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/{vine_id}", response_model=Vine)
 async def read_vine(
     *,
@@ -107,15 +346,16 @@ async def read_vine_by_alpha_id(
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get vine by alphanumeric ID.
+    Get vine by alphanumeric ID (the QR label scan lookup).
+    Cached vines are returned as stored JSON, without a query or re-serializing.
     """
-    vine = await crud_vine.vine.get_by_alpha_id(db, alpha_id=alpha_id)
-    if not vine:
+    data = await crud_vine.vine.get_json_by_alpha_id(db, alpha_id=alpha_id)
+    if data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vine not found",
         )
-    return vine
+    return Response(content=data, media_type="application/json")
 
 
 @router.get("/by-location/{field_name}/{row_number}/{spot_number}", response_model=List[Vine])
@@ -136,6 +376,35 @@ async def read_vine_by_location(
     return vines
 
 
+@router.get("/fields/{field_name}/layout", response_model=VineFieldLayout)
+async def read_field_layout(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    field_name: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    The whole field as a compact grid: per row, the vine id at every spot and
+    alive/dead bitmaps. Send the ETag back as If-None-Match to get a 304 when
+    nothing in the field has changed.
+    """
+    version = await crud_vine.vine.field_layout_version(db, field_name=field_name)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Field not found",
+        )
+    etag = f'"{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    layout = await crud_vine.vine.get_field_layout(db, field_name=field_name, version=version)
+    response.headers["ETag"] = etag
+    return layout.encode()
+
+
 @router.put("/{vine_id}", response_model=Vine)
 async def update_vine(
     *,
@@ -147,13 +416,12 @@ async def update_vine(
     """
     Update a vine.
     """
-    vine = await crud_vine.vine.get(db, id=vine_id)
+    vine = await crud_vine.vine.update_by_id(db, id=vine_id, obj_in=vine_in)
     if not vine:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vine not found",
         )
-    vine = await crud_vine.vine.update(db, db_obj=vine, obj_in=vine_in)
     return vine
 
 
@@ -167,11 +435,10 @@ async def delete_vine(
     """
     Delete a vine.
     """
-    vine = await crud_vine.vine.get(db, id=vine_id)
+    vine = await crud_vine.vine.remove(db, id=vine_id)
     if not vine:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vine not found",
         )
-    vine = await crud_vine.vine.remove(db, id=vine_id)
     return vine
\ No newline at end of file
@@ -1,32 +1,64 @@
-from typing import AsyncGenerator
+import hashlib
+import time
+from typing import AsyncGenerator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.security import verify_password
 from app.crud.crud_user import user as crud_user
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.user import User
 from app.schemas.token import TokenPayload
 
+# Response header carrying the cursor for the next page of a list endpoint; list
+# bodies stay plain JSON arrays so existing clients are unaffected
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
+# Verified claims keyed by a digest of the token, so repeat requests skip the
+# signature check and pydantic validation
+token_cache: TTLCache[TokenPayload] = TTLCache(
+    "token_claims",
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+    enabled=settings.TOKEN_CACHE_ENABLED,
+)
+
+
+def decode_token(token: str) -> TokenPayload:
+    """
+    Verify a JWT and return its claims, using the verified-claims cache.
+    Raises jwt.JWTError or ValidationError for invalid or expired tokens.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_data = TokenPayload(**payload)
+
+    # Never keep a token cached past its own expiry
+    exp = payload.get("exp")
+    token_cache.set(key, token_data, ttl=exp - time.time() if exp else None)
+    return token_data
+
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(reusable_oauth2),
 ) -> User:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = decode_token(token)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,7 +67,8 @@ async def get_current_user(
         )
     
     try:
-        user = await crud_user.get(db, id=token_data.sub)
+        # Served from the principal cache when warm, so no query is needed to authenticate
+        user = await crud_user.get_cached(db, id=token_data.sub)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return user
@@ -62,4 +95,10 @@ async def get_current_active_superuser(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges",
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """Send the next page's cursor, if there is one, in the X-Next-Cursor header."""
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
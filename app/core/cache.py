@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+# Every cache registers itself here so its counters can be reported in one place
+registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache(Generic[V]):
+    """
+    Small in-process LRU cache with a per-entry time to live.
+
+    Entries are evicted least-recently-used first once `max_size` is reached,
+    and are treated as missing once their TTL has passed. Hit, miss and
+    eviction counters are kept for reporting.
+    """
+
+    def __init__(self, name: str, *, max_size: int = 1024, ttl: float = 60.0, enabled: bool = True):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        # Caches are shared by the event loop and worker threads (e.g. the
+        # threadpool FastAPI uses for sync dependencies), so guard mutations
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        registry[name] = self
+
+    def get(self, key: Hashable) -> Optional[V]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Store a value. `ttl` overrides the cache default for this entry only.
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
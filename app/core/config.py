@@ -15,6 +15,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200  # 30 days
+    # bcrypt runs in a process pool; extra requests queue behind PASSWORD_HASH_MAX_PENDING
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
     
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -29,11 +32,92 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: PostgresDsn
+    # Connection pool, per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    # Total connections all workers together may open (0 = no budget). It is split
+    # evenly across WEB_CONCURRENCY workers, the same variable uvicorn reads for --workers
+    DB_MAX_CONNECTIONS: int = 0
+    WEB_CONCURRENCY: int = 1
+    # Optional read replica used by read-only listing endpoints
+    DATABASE_READ_URL: Optional[PostgresDsn] = None
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+    # After a client's own write, its reads stay on the primary for this long
+    READ_YOUR_WRITES_SECONDS: int = 10
+    # Query instrumentation: log statements slower than this, and warn when one
+    # statement shape runs this many times in a request (0 disables the warning)
+    DB_SLOW_QUERY_MS: int = 500
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
+    # Vine search in count_mode "auto" reports the planner's row estimate instead of
+    # an exact count once the estimate reaches this many rows
+    SEARCH_ESTIMATE_THRESHOLD: int = 10000
+    # POST /vines/sync/batch: largest accepted batch, and rows per INSERT ... ON CONFLICT
+    VINE_SYNC_MAX_BATCH: int = 5000
+    VINE_SYNC_CHUNK_SIZE: int = 500
+    # PATCH /vines/bulk: most vines one request may change (and most ids it may list)
+    VINE_BULK_MAX_ROWS: int = 5000
+    # GET /vines/export: rows fetched per round trip, and the timeouts that replace the
+    # 15s statement_timeout / 5s idle_in_transaction_session_timeout for the export
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_STATEMENT_TIMEOUT_SECONDS: int = 600
+    EXPORT_IDLE_TIMEOUT_SECONDS: int = 60
+    # CSV imports: largest accepted upload, the time limit for each statement of the
+    # load (and for waiting on the import ahead of it), and where uploads wait for
+    # their job (None = the system temp directory)
+    IMPORT_MAX_BYTES: int = 50 * 1024 * 1024
+    IMPORT_TIMEOUT_SECONDS: int = 600
+    IMPORT_TMP_DIR: Optional[str] = None
+    # /stats materialized views: refreshed this long after the first write that
+    # changes them, with this time limit per refresh statement
+    STATS_REFRESH_DELAY_SECONDS: float = 30.0
+    STATS_REFRESH_TIMEOUT_SECONDS: int = 300
     
     # Initial admin user
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
-    
+
+    # Authenticated user cache (avoids a users query on every request)
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 1024
+
+    # Verified JWT claims, keyed by token digest (entries never outlive the token's exp)
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_TTL_SECONDS: int = 3600
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+
+    # Field layout grids, keyed by field name. The layout endpoint checks each hit against
+    # the field's vine count and sum of change_xid, so other workers' writes are never
+    # served stale there; per-spot lookups use a cached grid only as a shortcut
+    FIELD_LAYOUT_CACHE_ENABLED: bool = True
+    FIELD_LAYOUT_CACHE_TTL_SECONDS: int = 600
+    FIELD_LAYOUT_CACHE_MAX_SIZE: int = 64
+
+    # Serialized vines keyed by alpha_numeric_id (GET /vines/by-alpha-id). Writes through
+    # this worker drop their entries at once; other workers' writes show within the TTL
+    VINE_CACHE_ENABLED: bool = True
+    VINE_CACHE_TTL_SECONDS: int = 60
+    VINE_CACHE_MAX_SIZE: int = 20000
+
+    # Browser cache lifetime for issue photos requested by their versioned URL (photo_url)
+    PHOTO_CACHE_MAX_AGE_SECONDS: int = 31536000
+    # Issue photo previews (?size=thumb|medium): longest edge in pixels, JPEG quality,
+    # and the process pool that resizes them
+    PHOTO_THUMB_MAX_EDGE: int = 320
+    PHOTO_MEDIUM_MAX_EDGE: int = 1280
+    PHOTO_VARIANT_QUALITY: int = 82
+    PHOTO_VARIANT_WORKERS: int = 2
+    PHOTO_VARIANT_MAX_PENDING: int = 16
+    # A stored photo no issue refers to is deleted, unless it was uploaded again within
+    # this long: a new issue with the same photo may not have been committed yet
+    PHOTO_GC_GRACE_SECONDS: int = 3600
+    # Upload validation and storage threads; further uploads queue behind IMAGE_UPLOAD_MAX_PENDING
+    IMAGE_UPLOAD_WORKERS: int = 4
+    IMAGE_UPLOAD_MAX_PENDING: int = 32
+
     # Environment
     ENVIRONMENT: str = "development"
     DEBUG: bool = False
@@ -0,0 +1,60 @@
+import json
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.request_context import current_request_scope, route_label
+from app.db.query_stats import QueryStats, current_query_stats
+
+logger = logging.getLogger("app.requests")
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware that exposes the current request to code that has no
+    access to it, such as SQLAlchemy pool and cursor events.
+
+    It also reports the request's SQL statement count and time as a
+    Server-Timing header and a structured log line.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        stats = QueryStats()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", f"{stats.server_timing()}, app;dur={elapsed_ms:.1f}")
+            await send(message)
+
+        scope_token = current_request_scope.set(scope)
+        stats_token = current_query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(stats_token)
+            current_request_scope.reset(scope_token)
+            # Logged after the body is sent, so streamed responses are counted in full
+            logger.info(json.dumps({
+                "event": "request",
+                "route": route_label(scope),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started_at) * 1000, 1),
+                "db_queries": stats.count,
+                "db_ms": round(stats.seconds * 1000, 1),
+                "repeated_statements": len(stats.repeated),
+            }))
@@ -0,0 +1,23 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# ASGI scope of the request being served by the current task, if any
+current_request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "current_request_scope", default=None
+)
+
+
+def route_label(scope: Optional[Dict[str, Any]]) -> str:
+    """
+    "METHOD /route/{template}" for a request scope, used to label metrics.
+    Falls back to the raw path before routing and to "background" outside requests.
+    """
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+def current_route_label() -> str:
+    return route_label(current_request_scope.get())
@@ -5,9 +5,18 @@ from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.workers import WorkerPool
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt costs hundreds of milliseconds of CPU per call, so it runs in its own
+# processes instead of stalling every other request on the event loop
+password_pool = WorkerPool(
+    "password_hashing",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
@@ -28,4 +37,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password in the password hashing pool (safe to await from handlers).
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password in the password hashing pool (safe to await from handlers).
+    """
+    return await password_pool.run(get_password_hash, password)
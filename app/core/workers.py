@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Every pool registers itself here so its counters can be reported in one place
+registry: Dict[str, "WorkerPool"] = {}
+
+
+class WorkerPool:
+    """
+    Bounded executor for CPU-heavy work that must not run on the event loop.
+
+    At most `max_workers` jobs run at once and at most `max_pending` more are
+    handed to the executor; further callers wait on a semaphore, which is what
+    `waiting` reports as queue depth. The executor is created on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_workers: int,
+        max_pending: Optional[int] = None,
+        use_processes: bool = True,
+    ):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_pending = self.max_workers if max_pending is None else max(0, max_pending)
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        registry[name] = self
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # "spawn" avoids forking a process that already runs the event loop and its threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run `fn(*args, **kwargs)` in the pool and await its result.
+        For process pools `fn` and its arguments must be picklable.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers + self.max_pending)
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": "process" if self.use_processes else "thread",
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+
+def shutdown_worker_pools() -> None:
+    """Shut down every registered pool (called on application shutdown)."""
+    for pool in registry.values():
+        try:
+            pool.shutdown()
+        except Exception as e:
+            logger.error(f"Error shutting down worker pool {pool.name}: {str(e)}")
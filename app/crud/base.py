@@ -1,10 +1,11 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Set, Type, TypeVar, Union
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import delete, insert, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from app.crud.pagination import Keyset
 from app.db.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -21,35 +22,80 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        self._column_keys: Optional[Set[str]] = None
+        # Primary key order for get_multi; cursors resume after the last id seen
+        self.keyset = Keyset(model.__tablename__, model.id)
+
+    @property
+    def column_keys(self) -> Set[str]:
+        """Mapped column attributes; schema fields outside this set are not written."""
+        # Resolved on first use, once every model is imported and the mappers can configure
+        if self._column_keys is None:
+            self._column_keys = {attr.key for attr in inspect(self.model).column_attrs}
+        return self._column_keys
+
+    def _to_dict(
+        self, obj_in: Union[BaseModel, Dict[str, Any]], *, exclude_unset: bool = False
+    ) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            data = obj_in
+        # Handle both Pydantic v1 and v2
+        elif hasattr(obj_in, "model_dump"):
+            # Pydantic v2
+            data = obj_in.model_dump(exclude_unset=exclude_unset)
+        else:
+            # Pydantic v1
+            data = obj_in.dict(exclude_unset=exclude_unset)
+        return {k: v for k, v in data.items() if k in self.column_keys}
+
+    def schema_columns(self, schema: Type[BaseModel]) -> List[str]:
+        """Mapped columns a response schema reads, for use as a `columns` projection."""
+        return [name for name in schema.model_fields if name in self.column_keys]
+
+    def _load_only(
+        self, columns: Optional[Sequence[str]], keyset: Optional[Keyset] = None
+    ) -> List[Any]:
+        # Unlisted columns are left unloaded; the keyset columns are always included
+        # so the next page's cursor can be built from the last row
+        if not columns:
+            return []
+        attrs = {getattr(self.model, column) for column in columns}
+        attrs.update((keyset or self.keyset).columns)
+        return [load_only(*attrs)]
+
+    def after_write(self, db_obj: ModelType) -> None:
+        """
+        Called once create, update_by_id or remove has committed a row;
+        override to drop data derived from the table.
+        """
 
     async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
         result = await db.execute(select(self.model).filter(self.model.id == id))
         return result.scalars().first()
 
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[ModelType]:
+        query = self.keyset.apply(select(self.model), cursor)
         result = await db.execute(
-            select(self.model).offset(skip).limit(limit)
+            query.offset(skip).limit(limit).options(*self._load_only(columns))
         )
         return result.scalars().all()
 
     async def create(self, db: AsyncSession, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]) -> ModelType:
-        if isinstance(obj_in, dict):
-            obj_in_data = obj_in
-        else:
-            # Handle both Pydantic v1 and v2
-            if hasattr(obj_in, "model_dump"):
-                # Pydantic v2
-                obj_in_data = obj_in.model_dump()
-            else:
-                # Pydantic v1
-                obj_in_data = obj_in.dict()
-        
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
+        # INSERT ... RETURNING gives back server defaults without a follow-up refresh
+        result = await db.execute(
+            insert(self.model).values(**self._to_dict(obj_in)).returning(self.model)
+        )
+        db_obj = result.scalars().one()
         await db.commit()
-        await db.refresh(db_obj)
+        self.after_write(db_obj)
         return db_obj
 
     async def update(
@@ -59,27 +105,44 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            # Handle both Pydantic v1 and v2
-            if hasattr(obj_in, "model_dump"):
-                # Pydantic v2
-                update_data = obj_in.model_dump(exclude_unset=True)
-            else:
-                # Pydantic v1
-                update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        updated = await self.update_by_id(db, id=db_obj.id, obj_in=obj_in)
+        # populate_existing refreshes db_obj in place; None means the row was deleted meanwhile
+        return updated if updated is not None else db_obj
+
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """
+        Update a row by primary key in one UPDATE ... RETURNING statement.
+        Returns None when no row has that id, so callers don't need to fetch first.
+        """
+        update_data = self._to_dict(obj_in, exclude_unset=True)
+        if not update_data:
+            return await self.get(db, id=id)
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**update_data)
+            .returning(self.model)
+            .execution_options(populate_existing=True, synchronize_session=False)
+        )
+        db_obj = result.scalars().first()
         await db.commit()
-        await db.refresh(db_obj)
+        if db_obj is not None:
+            self.after_write(db_obj)
         return db_obj
 
-    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
-        obj = await db.get(self.model, id)
-        await db.delete(obj)
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        """Delete a row by primary key and return it, or None if it didn't exist."""
+        result = await db.execute(
+            delete(self.model).where(self.model.id == id).returning(self.model)
+        )
+        obj = result.scalars().first()
         await db.commit()
-        return obj
\ No newline at end of file
+        if obj is not None:
+            self.after_write(obj)
+        return obj
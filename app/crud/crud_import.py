@@ -0,0 +1,43 @@
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.crud.pagination import Keyset
+from app.models.import_job import ImportJob, ImportJobError
+from app.schemas.import_job import ImportJobCreate, ImportJobUpdate
+
+
+class CRUDImportJob(CRUDBase[ImportJob, ImportJobCreate, ImportJobUpdate]):
+    # Newest first
+    recent_keyset = Keyset("imports_recent", ImportJob.id, descending=True)
+
+    async def get_recent(
+        self, db: AsyncSession, *, limit: int = 20, cursor: Optional[str] = None
+    ) -> List[ImportJob]:
+        query = self.recent_keyset.apply(select(ImportJob), cursor)
+        result = await db.execute(query.limit(limit))
+        return result.scalars().all()
+
+    async def get_errors(
+        self, db: AsyncSession, *, job_id: int, skip: int = 0, limit: int = 100
+    ) -> List[ImportJobError]:
+        result = await db.execute(
+            select(ImportJobError)
+            .filter(ImportJobError.job_id == job_id)
+            .order_by(ImportJobError.row_number, ImportJobError.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def count_error_rows(self, db: AsyncSession, *, job_id: int) -> int:
+        result = await db.execute(
+            select(func.count(ImportJobError.row_number.distinct()))
+            .filter(ImportJobError.job_id == job_id)
+        )
+        return result.scalar()
+
+
+import_job = CRUDImportJob(ImportJob)
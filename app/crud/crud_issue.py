@@ -1,19 +1,21 @@
-from typing import List, Optional, Tuple, Any, Dict, Union
+from typing import List, Optional, Sequence, Tuple, Any, Dict, Union
 import base64
 import os
 import logging
 
-from fastapi.encoders import jsonable_encoder
 from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy.orm import aliased, joinedload, load_only, undefer
 from app.utils.image_utils import (
     decode_base64_image, 
     save_uploaded_image, 
-    get_image_url
+    get_image_url,
+    remove_stored_photo,
 )
 
 from app.crud.base import CRUDBase
+from app.crud.crud_stats import stats_refresher
+from app.crud.pagination import Keyset
 from app.models.issue import VineIssue
 from app.models.user import User
 from app.models.vine import Vine
@@ -21,6 +23,12 @@ from app.schemas.issue import IssueCreate, IssueUpdate
 
 
 class CRUDIssue(CRUDBase[VineIssue, IssueCreate, IssueUpdate]):
+    # Newest first; backed by the (date_reported, issue_id) indexes
+    date_keyset = Keyset("issues_by_date", VineIssue.date_reported, VineIssue.id, descending=True)
+
+    def after_write(self, db_obj: VineIssue) -> None:
+        stats_refresher.mark_stale("issues")
+
     # Override create method to handle photo data
     async def create(self, db: AsyncSession, *, obj_in: Union[IssueCreate, Dict[str, Any]]) -> VineIssue:
         # Process the issue data
@@ -70,14 +78,8 @@ class CRUDIssue(CRUDBase[VineIssue, IssueCreate, IssueUpdate]):
                 print(f"Error processing photo data: {e}")
                 # If there's an error, we won't set any photo fields
         
-        # Create the issue using the parent class method with the dictionary
-        # We need to pass the dictionary directly instead of through obj_in
-        # to avoid the parent class trying to call .dict() on it again
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        # Create the issue using the parent class method with the prepared dictionary
+        return await super().create(db, obj_in=obj_in_data)
     
     # Override update method to handle photo data
     async def update(
@@ -129,41 +131,74 @@ class CRUDIssue(CRUDBase[VineIssue, IssueCreate, IssueUpdate]):
                 print(f"Error processing photo data: {e}")
                 # If there's an error, we won't set any photo fields
         
-        # Update the issue using direct attribute setting instead of parent method
-        # to avoid the parent class trying to call .dict() on the dictionary again
-        obj_data = jsonable_encoder(db_obj)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        # Update the issue using the parent class method with the prepared dictionary
+        old_photo_path = db_obj.photo_path
+        updated = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        if updated.photo_path != old_photo_path:
+            await self.release_photo(db, photo_path=old_photo_path)
+        return updated
+    
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[VineIssue]:
+        obj = await super().remove(db, id=id)
+        if obj is not None:
+            await self.release_photo(db, photo_path=obj.photo_path)
+        return obj
+    
+    async def photo_references(self, db: AsyncSession, *, photo_path: str) -> int:
+        """How many issues use a stored photo; identical uploads share one file"""
+        result = await db.execute(
+            select(func.count()).select_from(VineIssue).filter(VineIssue.photo_path == photo_path)
+        )
+        return result.scalar_one()
+    
+    async def release_photo(self, db: AsyncSession, *, photo_path: Optional[str]) -> None:
+        """Delete a stored photo once the last issue using it has let go of it"""
+        if photo_path and not await self.photo_references(db, photo_path=photo_path):
+            await remove_stored_photo(photo_path)
     
     async def get_by_vine_id(
-        self, db: AsyncSession, *, vine_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        vine_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[VineIssue]:
+        query = self.date_keyset.apply(
+            select(VineIssue).filter(VineIssue.vine_id == vine_id), cursor
+        )
         result = await db.execute(
-            select(VineIssue)
-            .filter(VineIssue.vine_id == vine_id)
-            .order_by(VineIssue.date_reported.desc())
-            .offset(skip)
-            .limit(limit)
+            query.offset(skip).limit(limit).options(*self._load_only(columns, self.date_keyset))
         )
         return result.scalars().all()
 
     async def get_by_status(
-        self, db: AsyncSession, *, is_resolved: bool, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        is_resolved: bool,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[VineIssue]:
+        query = self.date_keyset.apply(
+            select(VineIssue).filter(VineIssue.is_resolved == is_resolved), cursor
+        )
         result = await db.execute(
-            select(VineIssue)
-            .filter(VineIssue.is_resolved == is_resolved)
-            .order_by(VineIssue.date_reported.desc())
-            .offset(skip)
-            .limit(limit)
+            query.offset(skip).limit(limit).options(*self._load_only(columns, self.date_keyset))
         )
         return result.scalars().all()
     
+    async def get_with_photo(self, db: AsyncSession, *, id: int) -> Optional[VineIssue]:
+        """Get an issue with the deferred legacy photo_data blob loaded"""
+        result = await db.execute(
+            select(VineIssue).filter(VineIssue.id == id).options(undefer(VineIssue.photo_data))
+        )
+        return result.scalars().first()
+    
     async def get_with_details(
         self, db: AsyncSession, *, issue_id: int
     ) -> Optional[Tuple[VineIssue, User, Optional[User], Vine]]:
@@ -186,20 +221,30 @@ class CRUDIssue(CRUDBase[VineIssue, IssueCreate, IssueUpdate]):
         return row
     
     async def get_multi_with_details(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> List[Tuple[VineIssue, User, Optional[User], Vine]]:
         """Get multiple issues with reporter, resolver, and vine details"""
         reporter = aliased(User)
         resolver = aliased(User)
         
-        result = await db.execute(
+        query = self.date_keyset.apply(
             select(VineIssue, reporter, resolver, Vine)
             .join(reporter, VineIssue.reported_by == reporter.id)
             .outerjoin(resolver, VineIssue.resolved_by == resolver.id)
-            .join(Vine, VineIssue.vine_id == Vine.id)
-            .order_by(VineIssue.date_reported.desc())
-            .offset(skip)
+            .join(Vine, VineIssue.vine_id == Vine.id),
+            cursor,
+        )
+        # Only the vine's alphanumeric ID is shown alongside each issue
+        result = await db.execute(
+            query.offset(skip)
             .limit(limit)
+            .options(*self._load_only(columns, self.date_keyset), load_only(Vine.alpha_numeric_id))
         )
         
         return result.all()
@@ -5,6 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.crud.base import CRUDBase
+from app.crud.crud_stats import stats_refresher
+from app.crud.pagination import Keyset
 from app.models.maintenance import MaintenanceActivity, MaintenanceType
 from app.schemas.maintenance import (
     MaintenanceActivityCreate,
@@ -15,35 +17,54 @@ from app.schemas.maintenance import (
 
 
 class CRUDMaintenanceType(CRUDBase[MaintenanceType, MaintenanceTypeCreate, MaintenanceTypeUpdate]):
+    def after_write(self, db_obj: MaintenanceType) -> None:
+        # Activity stats carry the type names
+        stats_refresher.mark_stale("activities")
+
     async def get_by_name(self, db: AsyncSession, *, name: str) -> Optional[MaintenanceType]:
         result = await db.execute(select(MaintenanceType).filter(MaintenanceType.name == name))
         return result.scalars().first()
 
 
 class CRUDMaintenanceActivity(CRUDBase[MaintenanceActivity, MaintenanceActivityCreate, MaintenanceActivityUpdate]):
+    # Most recent first; backed by the (activity_date, activity_id) indexes
+    date_keyset = Keyset(
+        "activities_by_date", MaintenanceActivity.activity_date, MaintenanceActivity.id, descending=True
+    )
+
+    def after_write(self, db_obj: MaintenanceActivity) -> None:
+        stats_refresher.mark_stale("activities")
+
     async def get_by_vine_id(
-        self, db: AsyncSession, *, vine_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        vine_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[MaintenanceActivity]:
+        query = self.date_keyset.apply(
+            select(MaintenanceActivity).filter(MaintenanceActivity.vine_id == vine_id), cursor
+        )
         result = await db.execute(
-            select(MaintenanceActivity)
-            .filter(MaintenanceActivity.vine_id == vine_id)
-            .order_by(MaintenanceActivity.activity_date.desc())
-            .offset(skip)
-            .limit(limit)
-            .options(joinedload(MaintenanceActivity.type))
+            query.offset(skip).limit(limit).options(joinedload(MaintenanceActivity.type))
         )
         return result.scalars().all()
 
     async def get_by_type(
-        self, db: AsyncSession, *, type_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        type_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[MaintenanceActivity]:
-        result = await db.execute(
-            select(MaintenanceActivity)
-            .filter(MaintenanceActivity.type_id == type_id)
-            .order_by(MaintenanceActivity.activity_date.desc())
-            .offset(skip)
-            .limit(limit)
+        query = self.date_keyset.apply(
+            select(MaintenanceActivity).filter(MaintenanceActivity.type_id == type_id), cursor
         )
+        result = await db.execute(query.offset(skip).limit(limit))
         return result.scalars().all()
 
 
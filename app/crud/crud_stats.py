@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from sqlalchemy import column, func, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# Materialized views behind /stats (created by migration a9d4e2f7c315), with the
+# kinds of rows each one is computed from
+STATS_VIEWS: Dict[str, FrozenSet[str]] = {
+    "stats_vines_by_variety": frozenset({"vines"}),
+    "stats_vines_by_rootstock": frozenset({"vines"}),
+    "stats_vines_by_field": frozenset({"vines"}),
+    "stats_vines_by_planting_year": frozenset({"vines"}),
+    "stats_deaths_by_month": frozenset({"vines"}),
+    "stats_open_issues_by_field": frozenset({"vines", "issues"}),
+    "stats_activities_by_type_month": frozenset({"activities"}),
+}
+
+# Only one worker refreshes at a time; the others retry after their next delay
+STATS_LOCK_KEY = int.from_bytes(b"stats", "big")
+
+stats_refreshes = table("stats_refreshes", column("view_name"), column("refreshed_at"))
+
+# Per dimension: the view, and its group key columns
+VINE_COUNT_VIEWS = {
+    "variety": ("stats_vines_by_variety", ("variety",)),
+    "rootstock": ("stats_vines_by_rootstock", ("rootstock",)),
+    "field": ("stats_vines_by_field", ("vineyard_name", "field_name")),
+    "planting_year": ("stats_vines_by_planting_year", ("year_of_planting",)),
+}
+
+
+def _key(value: Any) -> Any:
+    # The views group missing values under '' or 0, since a unique index can't match NULLs
+    return None if value in ("", 0) else value
+
+
+class StatsRefresher:
+    """
+    Keeps the stats views current. A write marks the views computed from
+    the changed kind of row as stale, and they are refreshed (CONCURRENTLY,
+    so readers never block) STATS_REFRESH_DELAY_SECONDS later. A burst of
+    writes such as a batch sync is folded into one refresh.
+    """
+
+    def __init__(self) -> None:
+        self.pending: Set[str] = set()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def mark_stale(self, source: str) -> None:
+        """Schedule a refresh of the views computed from `source` ("vines", "issues" or "activities")."""
+        self.pending.update(name for name, sources in STATS_VIEWS.items() if source in sources)
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop (e.g. a script); the next write or manual refresh picks it up
+                return
+            self._task = loop.create_task(self._refresh_later())
+
+    async def _refresh_later(self) -> None:
+        while self.pending:
+            await asyncio.sleep(settings.STATS_REFRESH_DELAY_SECONDS)
+            views, self.pending = self.pending, set()
+            try:
+                if not await self.refresh(views):
+                    # Another worker's refresh may have started before our writes committed
+                    self.pending |= views
+            except Exception as e:
+                logger.error(f"Stats refresh failed: {str(e)}")
+
+    async def refresh(self, views: Optional[Iterable[str]] = None) -> bool:
+        """
+        REFRESH MATERIALIZED VIEW CONCURRENTLY the given views (all of them by
+        default) and record when. Returns False, without waiting, when another
+        refresh is running.
+        """
+        names = sorted(views or STATS_VIEWS)
+        # Runs on the raw asyncpg connection so every statement can pass its own
+        # timeout; the engine's 5s command_timeout is meant for API queries
+        timeout = settings.STATS_REFRESH_TIMEOUT_SECONDS
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            connection = raw.driver_connection
+            async with connection.transaction():
+                locked = await connection.fetchval(
+                    "SELECT pg_try_advisory_xact_lock($1)", STATS_LOCK_KEY, timeout=timeout
+                )
+                if not locked:
+                    return False
+                await connection.execute(
+                    f"SET LOCAL statement_timeout = {int(timeout * 1000)}", timeout=timeout
+                )
+                for name in names:
+                    # The data is as of the start of the refresh, not its end
+                    started_at = await connection.fetchval(
+                        "SELECT clock_timestamp() AT TIME ZONE 'utc'", timeout=timeout
+                    )
+                    await connection.execute(
+                        f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}", timeout=timeout
+                    )
+                    await connection.execute(
+                        "INSERT INTO stats_refreshes (view_name, refreshed_at) VALUES ($1, $2) "
+                        "ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at",
+                        name,
+                        started_at,
+                        timeout=timeout,
+                    )
+        return True
+
+
+stats_refresher = StatsRefresher()
+
+
+class CRUDStats:
+    """Reads from the stats materialized views."""
+
+    async def refreshed_at(self, db: AsyncSession, *views: str) -> Optional[datetime]:
+        """When the oldest of the views was last refreshed: the data is at least this fresh."""
+        result = await db.execute(
+            select(func.min(stats_refreshes.c.refreshed_at))
+            .filter(stats_refreshes.c.view_name.in_(views))
+        )
+        return result.scalar()
+
+    async def refresh_status(self, db: AsyncSession) -> Dict[str, Optional[datetime]]:
+        result = await db.execute(select(stats_refreshes.c.view_name, stats_refreshes.c.refreshed_at))
+        refreshed = dict(result.all())
+        return {name: refreshed.get(name) for name in STATS_VIEWS}
+
+    async def vine_counts(self, db: AsyncSession, *, by: str) -> List[Dict[str, Any]]:
+        """Vine totals per group of one dimension (see VINE_COUNT_VIEWS), largest first."""
+        name, keys = VINE_COUNT_VIEWS[by]
+        view = table(name, *(column(key) for key in keys), column("total"), column("dead"))
+        result = await db.execute(
+            select(view).order_by(view.c.total.desc(), *(view.c[key] for key in keys))
+        )
+        return [
+            {
+                **{key: _key(row._mapping[key]) for key in keys},
+                "total": row.total,
+                "alive": row.total - row.dead,
+                "dead": row.dead,
+            }
+            for row in result
+        ]
+
+    async def deaths_by_month(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        view = table("stats_deaths_by_month", column("month"), column("deaths"))
+        result = await db.execute(select(view).order_by(view.c.month))
+        return [{"month": row.month, "deaths": row.deaths} for row in result]
+
+    async def vine_totals(self, db: AsyncSession) -> Dict[str, int]:
+        view = table("stats_vines_by_field", column("total"), column("dead"))
+        total, dead = (
+            await db.execute(
+                select(func.coalesce(func.sum(view.c.total), 0), func.coalesce(func.sum(view.c.dead), 0))
+            )
+        ).one()
+        return {"total": int(total), "dead": int(dead)}
+
+    async def open_issues_by_field(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        view = table(
+            "stats_open_issues_by_field",
+            column("vineyard_name"),
+            column("field_name"),
+            column("open_issues"),
+            column("vines_affected"),
+        )
+        result = await db.execute(
+            select(view).order_by(view.c.open_issues.desc(), view.c.vineyard_name, view.c.field_name)
+        )
+        return [
+            {
+                "vineyard_name": _key(row.vineyard_name),
+                "field_name": _key(row.field_name),
+                "open_issues": row.open_issues,
+                "vines_affected": row.vines_affected,
+            }
+            for row in result
+        ]
+
+    async def activities_by_type_month(self, db: AsyncSession, *, months: int) -> List[Dict[str, Any]]:
+        view = table(
+            "stats_activities_by_type_month",
+            column("type_id"),
+            column("type_name"),
+            column("month"),
+            column("activities"),
+        )
+        # The current month and the months - 1 before it
+        now = datetime.utcnow()
+        month_index = now.year * 12 + now.month - 1 - (months - 1)
+        first_month = datetime(month_index // 12, month_index % 12 + 1, 1)
+        result = await db.execute(
+            select(view).filter(view.c.month >= first_month).order_by(view.c.month, view.c.type_id)
+        )
+        return [dict(row._mapping) for row in result]
+
+
+stats = CRUDStats()
@@ -1,16 +1,41 @@
 from typing import Any, Dict, Optional, Union
 
-from fastapi.encoders import jsonable_encoder
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import get_password_hash_async
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+# Detached User rows keyed by id, used to authenticate requests without a query
+user_cache: TTLCache[User] = TTLCache(
+    "users",
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    enabled=settings.USER_CACHE_ENABLED,
+)
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    async def get_cached(self, db: AsyncSession, *, id: Any) -> Optional[User]:
+        """
+        Get a user by id through the principal cache.
+        The cache holds detached instances; a copy is merged into `db` without
+        emitting SQL, so cache hits never check out a connection.
+        """
+        cached = user_cache.get(id)
+        if cached is None:
+            cached = await self.get(db, id=id)
+            if not cached:
+                return None
+            # Keep a pristine detached copy so request-level changes never leak into the cache
+            db.expunge(cached)
+            user_cache.set(id, cached)
+        return await db.merge(cached, load=False)
+
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
         # In the actual database, we're using user_name as the identifier
         # For the authentication we'll use user_name as the email
@@ -19,9 +44,8 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         
         # If user found, set up the authentication-related fields that aren't in the database
         if user:
-            # Set dummy values for testing - in a real system, these would be stored somewhere
+            # No password hash is stored for these users, so don't compute one on every lookup
             user.email = user.user_name  # Use username as email
-            user.hashed_password = get_password_hash("password")  # Default password for all users
             user.is_active = True
             user.is_superuser = user.user_role == "administrator"
         
@@ -30,25 +54,19 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         # In the real implementation, we'd store auth info in a separate table or service
         # For the current DB schema, we can only add user_name and user_role
-        db_obj = User(
-            user_name=obj_in.email,  # Use email as user_name
-            user_role="user",  # Default role
+        hashed_password = await get_password_hash_async(obj_in.password)
+        db_obj = await super().create(
+            db,
+            obj_in={
+                "user_name": obj_in.email,  # Use email as user_name
+                "user_role": "user",  # Default role
+            },
         )
+        user_cache.invalidate(db_obj.id)
         
-        # Set non-DB fields after creating the object
-        db_obj._email = obj_in.email
-        db_obj.hashed_password = get_password_hash(obj_in.password)
-        db_obj.full_name = obj_in.full_name
-        db_obj.is_superuser = obj_in.is_superuser
-        db_obj.is_active = obj_in.is_active
-        
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        
-        # Re-set non-DB fields after refresh because they're not in the database
+        # Set non-DB fields on the returned row because they're not in the database
         db_obj._email = obj_in.email
-        db_obj.hashed_password = get_password_hash(obj_in.password)
+        db_obj.hashed_password = hashed_password
         db_obj.full_name = obj_in.full_name
         db_obj.is_superuser = obj_in.is_superuser
         db_obj.is_active = obj_in.is_active
@@ -59,30 +77,10 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
     ) -> User:
         # For the current implementation, we can only update user_name and user_role in DB
-        # Other fields would be handled separately in a real implementation
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            # Handle both Pydantic v1 and v2
-            if hasattr(obj_in, "model_dump"):
-                # Pydantic v2
-                update_data = obj_in.model_dump(exclude_unset=True)
-            else:
-                # Pydantic v1
-                update_data = obj_in.dict(exclude_unset=True)
-            
-        # Remove fields that don't exist in the DB schema
-        db_only_data = {k: v for k, v in update_data.items() 
-                       if k in ["user_name", "user_role"]}
-        
-        # Update the user directly without using the parent method
-        obj_data = jsonable_encoder(db_obj)
-        for field in obj_data:
-            if field in db_only_data:
-                setattr(db_obj, field, db_only_data[field])
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        # Other fields would be handled separately in a real implementation;
+        # the parent method drops anything that isn't a mapped column
+        db_obj = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        user_cache.invalidate(db_obj.id)
         return db_obj
 
     async def authenticate(self, db: AsyncSession, *, email: str, password: str) -> Optional[User]:
@@ -93,8 +91,9 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             return None
             
         # For development/testing purposes, accept any password
-        # In production, you would use: if not verify_password(password, user.hashed_password):
-        #    return None
+        # In production, you would use:
+        #    if not await verify_password_async(password, user.hashed_password):
+        #        return None
         
         return user
 
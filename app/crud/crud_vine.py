@@ -1,52 +1,241 @@
-from typing import Any, Dict, List, Optional, Union
+import hashlib
+import json
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+)
 
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import Row, Select, and_, delete, func, literal_column, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.crud.base import CRUDBase
-from app.models.vine import Vine
-from app.schemas.vine import VineCreate, VineSearchParams, VineUpdate
+from app.crud.crud_issue import issue as crud_issue
+from app.crud.crud_stats import stats_refresher
+from app.crud.pagination import InvalidCursor, Keyset, decode_cursor, encode_cursor
+from app.models.issue import VineIssue
+from app.models.maintenance import MaintenanceActivity
+from app.models.vine import Vine, VineDeletion
+from app.schemas.vine import Vine as VineSchema
+from app.schemas.vine import VineCreate, VineFilters, VineSearchParams, VineUpdate
+from app.utils.field_layout import FieldLayout
+
+# Field layout grids keyed by field name; each entry carries the version it was built at
+field_layout_cache: TTLCache[FieldLayout] = TTLCache(
+    "field_layouts",
+    max_size=settings.FIELD_LAYOUT_CACHE_MAX_SIZE,
+    ttl=settings.FIELD_LAYOUT_CACHE_TTL_SECONDS,
+    enabled=settings.FIELD_LAYOUT_CACHE_ENABLED,
+)
+
+# Vines serialized to JSON, keyed by alpha_numeric_id, for QR-scan lookups
+vine_json_cache: TTLCache[bytes] = TTLCache(
+    "vines_by_alpha_id",
+    max_size=settings.VINE_CACHE_MAX_SIZE,
+    ttl=settings.VINE_CACHE_TTL_SECONDS,
+    enabled=settings.VINE_CACHE_ENABLED,
+)
+
+
+class VineSearchPage(NamedTuple):
+    items: List[Vine]
+    # None when the count was skipped
+    total: Optional[int]
+    has_next: bool
+    # "exact", "estimate" or "none"
+    count_mode: str
+
+
+class VineBulkResult(NamedTuple):
+    matched: int
+    # Empty on a dry run
+    updated_ids: List[int]
+
+
+class TooManyVines(ValueError):
+    """A bulk update matched more vines than its cap; nothing was changed."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"More vines match than the limit of {limit}")
+        self.limit = limit
+
+
+# Every transaction with a lower id has committed or rolled back; on a replica,
+# as far as it has replayed
+FINISHED_XID_SQL = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+class VineChangesPage(NamedTuple):
+    changed: List[Vine]
+    deleted: List[VineDeletion]
+    next_cursor: str
+    has_more: bool
 
 
 class CRUDVine(CRUDBase[Vine, VineCreate, VineUpdate]):
+    # Change feed order (by writing transaction); backed by ix_vine_inventory_change_xid_vine_id
+    # and ix_vine_deletions_change_xid_deletion_id
+    changes_keyset = Keyset("vine_changes", Vine.change_xid, Vine.id)
+    deletions_keyset = Keyset("vine_deletions", VineDeletion.change_xid, VineDeletion.id)
+
+    def __init__(self, model: Type[Vine]):
+        super().__init__(model)
+        # Bumped by every invalidation, so a lookup that raced a write doesn't cache what it read
+        self._cache_generation = 0
+
+    def invalidate_caches(
+        self,
+        field_names: Optional[Iterable[Optional[str]]] = None,
+        alpha_ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Drop cached data derived from vines; called by every vine write path.
+        Pass the fields the written vines are in and their alpha ids, or None
+        when they aren't known (a vine may have moved out of a field or been
+        renamed) to drop every entry.
+        """
+        self._cache_generation += 1
+        stats_refresher.mark_stale("vines")
+        if field_names is None:
+            field_layout_cache.clear()
+        else:
+            for field_name in set(field_names):
+                if field_name is not None:
+                    field_layout_cache.invalidate(field_name)
+        if alpha_ids is None:
+            vine_json_cache.clear()
+        else:
+            for alpha_id in set(alpha_ids):
+                vine_json_cache.invalidate(alpha_id)
+    
+    def after_write(self, db_obj: Vine) -> None:
+        self.invalidate_caches([db_obj.field_name], [db_obj.alpha_numeric_id])
+    
+    async def update_by_id(
+        self, db: AsyncSession, *, id: Any, obj_in: Union[VineUpdate, Dict[str, Any]]
+    ) -> Optional[Vine]:
+        db_obj = await super().update_by_id(db, id=id, obj_in=obj_in)
+        update_data = self._to_dict(obj_in, exclude_unset=True)
+        if db_obj is not None and ("field_name" in update_data or "alpha_numeric_id" in update_data):
+            # The field the vine moved out of, or the alpha id it had, isn't known any more
+            self.invalidate_caches(
+                None if "field_name" in update_data else [db_obj.field_name],
+                None if "alpha_numeric_id" in update_data else [db_obj.alpha_numeric_id],
+            )
+        return db_obj
+    
     async def get_by_alpha_id(self, db: AsyncSession, *, alpha_id: str) -> Optional[Vine]:
         result = await db.execute(select(Vine).filter(Vine.alpha_numeric_id == alpha_id))
         return result.scalars().first()
     
+    async def get_json_by_alpha_id(self, db: AsyncSession, *, alpha_id: str) -> Optional[bytes]:
+        """
+        The vine with this alpha id as serialized JSON, served from
+        vine_json_cache when possible; None if there is no such vine.
+        """
+        cached = vine_json_cache.get(alpha_id)
+        if cached is not None:
+            return cached
+        generation = self._cache_generation
+        db_obj = await self.get_by_alpha_id(db, alpha_id=alpha_id)
+        if db_obj is None:
+            return None
+        data = VineSchema.model_validate(db_obj).model_dump_json().encode()
+        if generation == self._cache_generation:
+            vine_json_cache.set(alpha_id, data)
+        return data
+    
     async def get_by_location(
         self, db: AsyncSession, *, field_name: str, row_number: int, spot_number: int
     ) -> List[Vine]:
-        result = await db.execute(
-            select(Vine).filter(
-                and_(
-                    Vine.field_name == field_name,
-                    Vine.row_number == row_number,
-                    Vine.spot_number == spot_number
-                )
-            )
+        """
+        Vines at a location. When the field's grid is already cached, the ids
+        it lists are read by primary key, still checked against the location
+        in case another worker moved them; otherwise, or if the grid lists
+        nobody or a vine has moved, it is one probe of the location index.
+        The grid is never built or version-checked here.
+        """
+        at_location = and_(
+            Vine.field_name == field_name,
+            Vine.row_number == row_number,
+            Vine.spot_number == spot_number
         )
+        layout = field_layout_cache.get(field_name)
+        ids = layout.lookup(row_number, spot_number) if layout is not None else []
+        if ids:
+            result = await db.execute(
+                select(Vine).filter(Vine.id.in_(ids), at_location).order_by(Vine.id)
+            )
+            vines = result.scalars().all()
+            if len(vines) == len(ids):
+                return vines
+        result = await db.execute(select(Vine).filter(at_location).order_by(Vine.id))
         return result.scalars().all()
     
-    async def search(
-        self, db: AsyncSession, *, params: VineSearchParams
-    ) -> tuple[List[Vine], int]:
+    async def field_layout_version(self, db: AsyncSession, *, field_name: str) -> Optional[str]:
         """
-        Search for vines with filters and pagination
-        Returns a tuple of (results, total_count)
+        Fingerprint of a field's vines: their count and the sum of their
+        change_xid. Every committed write gives the rows it touches its own
+        transaction id, so the sum moves even when a write commits after a
+        later one. None when the field has no vines. An index-only scan of
+        ix_vine_inventory_field_location.
+        """
+        count, xid_sum = (
+            await db.execute(
+                select(func.count(), func.sum(Vine.change_xid)).filter(Vine.field_name == field_name)
+            )
+        ).one()
+        if not count:
+            return None
+        return hashlib.sha1(f"{count}:{xid_sum}".encode()).hexdigest()[:16]
+    
+    async def get_field_layout(
+        self, db: AsyncSession, *, field_name: str, version: str
+    ) -> FieldLayout:
+        """
+        The field's layout grid at `version` (from field_layout_version). A
+        cached grid is reused only when it was built at the same version, so
+        writes made through other workers are never served stale.
+        """
+        layout = field_layout_cache.get(field_name)
+        if layout is None or layout.version != version:
+            result = await db.execute(
+                select(Vine.id, Vine.row_number, Vine.spot_number, Vine.is_dead)
+                .filter(Vine.field_name == field_name)
+                .order_by(Vine.id)
+            )
+            layout = FieldLayout.build(field_name, version, result.all())
+            field_layout_cache.set(field_name, layout)
+        return layout
+    
+    def _search_filters(self, params: VineFilters) -> List[Any]:
+        """
+        WHERE clauses for a search. Substring filters are served by the pg_trgm
+        GIN indexes, which handle both LIKE and ILIKE; wildcards in user input
+        are escaped so they match literally.
         """
-        query = select(Vine)
-        
-        # Apply filters
         filters = []
-        if params.alpha_numeric_id:
-            filters.append(Vine.alpha_numeric_id.contains(params.alpha_numeric_id))
-        if params.variety:
-            filters.append(Vine.variety.contains(params.variety))
-        if params.vineyard_name:
-            filters.append(Vine.vineyard_name.contains(params.vineyard_name))
-        if params.field_name:
-            filters.append(Vine.field_name.contains(params.field_name))
+        for field in ("alpha_numeric_id", "variety", "vineyard_name", "field_name"):
+            term = getattr(params, field)
+            if term:
+                column = getattr(Vine, field)
+                if params.case_sensitive:
+                    filters.append(column.contains(term, autoescape=True))
+                else:
+                    filters.append(column.icontains(term, autoescape=True))
         if params.row_number:
             filters.append(Vine.row_number == params.row_number)
         if params.is_dead is not None:
@@ -55,22 +244,84 @@ class CRUDVine(CRUDBase[Vine, VineCreate, VineUpdate]):
             filters.append(Vine.year_of_planting >= params.year_min)
         if params.year_max:
             filters.append(Vine.year_of_planting <= params.year_max)
+        return filters
+    
+    async def _estimate_rows(self, db: AsyncSession, query: Select) -> int:
+        """The planner's row estimate for a query, from EXPLAIN without running it"""
+        conn = await db.connection()
+        # EXPLAIN can't take bind parameters, so render the (escaped) literals inline
+        sql = str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    
+    async def search(
+        self, db: AsyncSession, *, params: VineSearchParams
+    ) -> VineSearchPage:
+        """
+        Search for vines with filters and pagination, in one query per page.
+        The total is exact (a window count), a planner estimate, or skipped,
+        according to params.include_total and params.count_mode.
+        """
+        query = select(Vine)
         
+        # Apply filters
+        filters = self._search_filters(params)
         if filters:
             query = query.filter(and_(*filters))
         
-        # Count total results for pagination
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await db.execute(count_query)
-        total_count = total.scalar()
+        count_mode = params.count_mode if params.include_total else "none"
+        total: Optional[int] = None
+        if count_mode in ("estimate", "auto"):
+            estimate = await self._estimate_rows(db, query)
+            if count_mode == "estimate" or estimate >= settings.SEARCH_ESTIMATE_THRESHOLD:
+                count_mode, total = "estimate", estimate
+            else:
+                count_mode = "exact"
         
-        # Apply pagination
+        # One extra row tells us whether there is a next page
         skip = (params.page - 1) * params.items_per_page
-        query = query.offset(skip).limit(params.items_per_page)
+        page_query = query.order_by(Vine.id).offset(skip).limit(params.items_per_page + 1)
+        if count_mode == "exact":
+            # count(*) OVER () is computed before OFFSET/LIMIT, so it is the full match count
+            page_query = page_query.add_columns(func.count().over().label("total_count"))
+        
+        result = await db.execute(page_query)
+        if count_mode == "exact":
+            rows = result.all()
+            vines = [row[0] for row in rows]
+            if rows:
+                total = rows[0].total_count
+            elif skip:
+                # Past the last page there are no rows to carry the window count
+                count_query = select(func.count()).select_from(query.subquery())
+                total = (await db.execute(count_query)).scalar()
+            else:
+                total = 0
+        else:
+            vines = result.scalars().all()
+        
+        has_next = len(vines) > params.items_per_page
+        return VineSearchPage(vines[:params.items_per_page], total, has_next, count_mode)
+    
+    async def stream_rows(
+        self, db: AsyncSession, *, params: VineFilters, columns: Sequence[str], batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Plain rows of the given columns for every vine matching the filters, in
+        id order, from a server-side cursor `batch_size` rows at a time. No ORM
+        objects are built and only one batch is held in memory.
+        """
+        query = select(*(getattr(Vine, column) for column in columns)).order_by(Vine.id)
+        filters = self._search_filters(params)
+        if filters:
+            query = query.filter(and_(*filters))
         
-        # Execute query and return results with total count
-        result = await db.execute(query)
-        return result.scalars().all(), total_count
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
     
     async def create_or_update(
         self, db: AsyncSession, *, obj_in: Union[VineCreate, VineUpdate]
@@ -79,27 +330,232 @@ class CRUDVine(CRUDBase[Vine, VineCreate, VineUpdate]):
         Create a new vine if it doesn't exist, otherwise update the existing one
         This is particularly useful for syncing from mobile devices
         """
-        existing_vine = await self.get_by_alpha_id(db, alpha_id=obj_in.alpha_numeric_id)
+        # A single INSERT ... ON CONFLICT ... RETURNING instead of select + write + refresh;
+        # only the fields the client sent overwrite an existing row
+        obj_data = self._to_dict(obj_in, exclude_unset=True)
+        obj_data["alpha_numeric_id"] = obj_in.alpha_numeric_id
+        changes = {k: v for k, v in obj_data.items() if k != "alpha_numeric_id"}
+        changes["updated_at"] = datetime.utcnow()
+        result = await db.execute(
+            pg_insert(Vine)
+            .values(**obj_data)
+            .on_conflict_do_update(index_elements=[Vine.alpha_numeric_id], set_=changes)
+            .returning(Vine)
+            .execution_options(populate_existing=True)
+        )
+        db_obj = result.scalars().one()
+        await db.commit()
+        self.invalidate_caches(
+            None if "field_name" in changes else [db_obj.field_name], [db_obj.alpha_numeric_id]
+        )
+        return db_obj
+
+    async def get_changes(
+        self, db: AsyncSession, *, since: Optional[str], limit: int
+    ) -> VineChangesPage:
+        """
+        Vines changed and deleted after the `since` cursor (everything when it's
+        None), at most `limit` of each, in commit order.
+        Rows are ordered by the transaction that wrote them (change_xid), and
+        only transactions that have finished are read. A transaction that
+        commits later has a higher id than any row returned, so nothing can
+        land behind the cursor, however long the writer took to commit.
+        The cursor tracks the (change_xid, id) of the last changed vine and of
+        the last tombstone.
+        """
+        # First, so the statements below see everything these transactions wrote
+        finished_xid = (await db.execute(FINISHED_XID_SQL)).scalar()
         
-        if existing_vine:
-            # Handle both Pydantic v1 and v2
-            if hasattr(obj_in, "model_dump"):
-                # Pydantic v2
-                obj_data = obj_in.model_dump(exclude_unset=True)
-            else:
-                # Pydantic v1
-                obj_data = obj_in.dict(exclude_unset=True)
-            # Update without going through the base class update method
-            obj_data_encoded = jsonable_encoder(existing_vine)
-            for field in obj_data_encoded:
-                if field in obj_data:
-                    setattr(existing_vine, field, obj_data[field])
-            db.add(existing_vine)
-            await db.commit()
-            await db.refresh(existing_vine)
-            return existing_vine
+        position: Optional[List[Any]] = None
+        if since:
+            payload = decode_cursor(since)
+            if payload.get("k") != self.changes_keyset.name:
+                raise InvalidCursor("Cursor does not belong to this listing")
+            if payload.get("u") is not None:
+                position = self.changes_keyset.parse_values(payload["u"])
+            deletion_position = self.deletions_keyset.parse_values(payload.get("d"))
         else:
-            return await self.create(db, obj_in=obj_in)
+            # A first sync downloads every vine, so finished deletions are irrelevant
+            deletion_position = [finished_xid, 0]
+        
+        changed_query = self.changes_keyset.seek(
+            select(Vine).filter(Vine.change_xid < finished_xid), position
+        )
+        changed = (await db.execute(changed_query.limit(limit + 1))).scalars().all()
+        
+        deleted_query = self.deletions_keyset.seek(
+            select(VineDeletion).filter(VineDeletion.change_xid < finished_xid), deletion_position
+        )
+        deleted = (await db.execute(deleted_query.limit(limit + 1))).scalars().all()
+        
+        has_more = len(changed) > limit or len(deleted) > limit
+        changed, deleted = changed[:limit], deleted[:limit]
+        if changed:
+            position = self.changes_keyset.values(changed[-1])
+        if deleted:
+            deletion_position = self.deletions_keyset.values(deleted[-1])
+        next_cursor = encode_cursor(
+            {"k": self.changes_keyset.name, "u": position, "d": deletion_position}
+        )
+        return VineChangesPage(changed, deleted, next_cursor, has_more)
+    
+    async def _upsert_rows(
+        self, db: AsyncSession, columns: FrozenSet[str], rows: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        table = Vine.__table__
+        stmt = pg_insert(table).values(rows)
+        changes = {name: stmt.excluded[name] for name in columns if name != "alpha_numeric_id"}
+        changes["updated_at"] = stmt.excluded.updated_at
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.alpha_numeric_id], set_=changes
+        ).returning(
+            table.c.vine_id,
+            table.c.alpha_numeric_id,
+            # xmax is 0 for a freshly inserted row version and set for an updated one
+            literal_column("xmax = 0").label("inserted"),
+        )
+        result = await db.execute(stmt)
+        return {
+            row.alpha_numeric_id: {
+                "id": row.vine_id,
+                "status": "created" if row.inserted else "updated",
+            }
+            for row in result
+        }
+    
+    async def _sync_chunk(
+        self,
+        db: AsyncSession,
+        columns: FrozenSet[str],
+        rows: List[Dict[str, Any]],
+        outcomes: Dict[str, Dict[str, Any]],
+    ) -> None:
+        try:
+            # A savepoint per chunk, so one bad row doesn't undo the rest of the batch
+            async with db.begin_nested():
+                outcomes.update(await self._upsert_rows(db, columns, rows))
+        except DBAPIError as e:
+            if len(rows) > 1:
+                # Retry the failed chunk row by row to isolate the offending items
+                for row in rows:
+                    await self._sync_chunk(db, columns, [row], outcomes)
+            else:
+                message = str(getattr(e, "orig", e)).strip().splitlines()[0]
+                outcomes[rows[0]["alpha_numeric_id"]] = {"id": None, "status": "error", "error": message}
+    
+    async def sync_batch(
+        self, db: AsyncSession, *, items: List[VineCreate], chunk_size: int = 500
+    ) -> List[Dict[str, Any]]:
+        """
+        Create or update many vines by alpha_numeric_id (batch mobile sync).
+        Each chunk is one INSERT ... ON CONFLICT DO UPDATE ... RETURNING; only the
+        fields each client sent overwrite existing values. Returns one result per
+        item, in request order.
+        """
+        # Postgres refuses to update the same row twice in one statement, so repeated
+        # vines are merged first; later items win field by field
+        merged: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            row = merged.setdefault(item.alpha_numeric_id, {"alpha_numeric_id": item.alpha_numeric_id})
+            row.update(self._to_dict(item, exclude_unset=True))
+        
+        # A multi-row VALUES list has one column list, so group rows by the fields they carry
+        groups: Dict[FrozenSet[str], List[Dict[str, Any]]] = {}
+        for row in merged.values():
+            groups.setdefault(frozenset(row), []).append(row)
+        
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        for columns, rows in groups.items():
+            for start in range(0, len(rows), chunk_size):
+                await self._sync_chunk(db, columns, rows[start:start + chunk_size], outcomes)
+        await db.commit()
+        self.invalidate_caches(None, merged)
+        
+        return [
+            {"index": index, "alpha_numeric_id": item.alpha_numeric_id, **outcomes[item.alpha_numeric_id]}
+            for index, item in enumerate(items)
+        ]
+    
+    async def bulk_update(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Optional[Sequence[int]] = None,
+        filters: Optional[VineFilters] = None,
+        obj_in: Union[VineUpdate, Dict[str, Any]],
+        max_affected: int,
+        dry_run: bool = False,
+    ) -> VineBulkResult:
+        """
+        Apply the same change to every vine in `ids`, or matching `filters`, in
+        one UPDATE ... RETURNING statement. A dry run only counts the matches.
+        Raises ValueError for filters that select every vine, and TooManyVines
+        when more than `max_affected` vines match; that is found by locking at
+        most max_affected + 1 of them, before anything is written.
+        """
+        where = [Vine.id.in_(ids)] if ids is not None else self._search_filters(filters)
+        if not where:
+            raise ValueError("Filters must narrow the selection; list ids to update specific vines")
+        
+        if dry_run:
+            matched = (await db.execute(select(func.count()).select_from(Vine).filter(*where))).scalar()
+            return VineBulkResult(matched, [])
+        
+        # updated_at is set by its onupdate default, so the change feed picks the vines up
+        update_data = self._to_dict(obj_in, exclude_unset=True)
+        # Lock the targets first, so an over-broad filter never rewrites (and bloats)
+        # rows only to roll them back; the locks hold them for the UPDATE
+        target_ids = (
+            await db.execute(
+                select(Vine.id).filter(*where).order_by(Vine.id).limit(max_affected + 1).with_for_update()
+            )
+        ).scalars().all()
+        if len(target_ids) > max_affected:
+            await db.rollback()
+            raise TooManyVines(max_affected)
+        if not target_ids:
+            await db.rollback()
+            return VineBulkResult(0, [])
+        result = await db.execute(
+            update(Vine)
+            .where(Vine.id.in_(target_ids), *where)
+            .values(**update_data)
+            .returning(Vine.id, Vine.alpha_numeric_id, Vine.field_name)
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await db.commit()
+        if rows:
+            # A vine moved to another field leaves one we can't name any more
+            self.invalidate_caches(
+                None if "field_name" in update_data else [row.field_name for row in rows],
+                [row.alpha_numeric_id for row in rows],
+            )
+        return VineBulkResult(len(rows), sorted(row.id for row in rows))
+    
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Vine]:
+        # The ORM cascade used to delete these; the foreign keys in the database have
+        # no ON DELETE CASCADE, so bulk-delete the dependants in the same transaction
+        result = await db.execute(
+            delete(VineIssue)
+            .where(VineIssue.vine_id == id)
+            .returning(VineIssue.photo_path)
+            .execution_options(synchronize_session=False)
+        )
+        photo_paths = {path for path in result.scalars() if path}
+        await db.execute(
+            delete(MaintenanceActivity)
+            .where(MaintenanceActivity.vine_id == id)
+            .execution_options(synchronize_session=False)
+        )
+        db_obj = await super().remove(db, id=id)
+        if db_obj is not None:
+            # Its activities went with it
+            stats_refresher.mark_stale("activities")
+        # Once committed, delete the issues' photos that no other issue shares
+        for photo_path in sorted(photo_paths):
+            await crud_issue.release_photo(db, photo_path=photo_path)
+        return db_obj
 
 
 vine = CRUDVine(Vine)
\ No newline at end of file
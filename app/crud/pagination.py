@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Select, literal, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or was issued by a different listing."""
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Opaque, URL-safe cursor for a JSON-serializable payload."""
+    data = json.dumps(payload, separators=(",", ":"), default=_json_default)
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Invalid cursor")
+    return payload
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Can't encode {type(value).__name__} in a cursor")
+
+
+class Keyset:
+    """
+    A unique sort key used for cursor (keyset) pagination.
+
+    Instead of OFFSET, a page starts with `WHERE (a, b) > (:a, :b)`, which
+    an index on the same columns answers without scanning the skipped rows.
+    The last column must be unique (the primary key) so the order is total.
+    """
+
+    def __init__(self, name: str, *columns: InstrumentedAttribute, descending: bool = False):
+        # The name is embedded in cursors so one listing's cursor can't be replayed against another
+        self.name = name
+        self.columns = columns
+        self.descending = descending
+
+    def order_by(self) -> List[Any]:
+        return [column.desc() if self.descending else column.asc() for column in self.columns]
+
+    def apply(self, query: Select, cursor: Optional[str]) -> Select:
+        """Order the query by this key and start it after `cursor`, if given."""
+        return self.seek(query, self.decode(cursor) if cursor else None)
+
+    def seek(self, query: Select, values: Optional[Sequence[Any]]) -> Select:
+        """Order the query by this key and start it after the row with these key values."""
+        query = query.order_by(*self.order_by())
+        if values is not None:
+            if len(self.columns) == 1:
+                key, bound = self.columns[0], literal(values[0], self.columns[0].type)
+            else:
+                key = tuple_(*self.columns)
+                bound = tuple_(*(literal(v, c.type) for c, v in zip(self.columns, values)))
+            query = query.filter(key < bound if self.descending else key > bound)
+        return query
+
+    def values(self, obj: Any) -> List[Any]:
+        return [getattr(obj, column.key) for column in self.columns]
+
+    def encode(self, obj: Any) -> str:
+        return encode_cursor({"k": self.name, "v": self.values(obj)})
+
+    def decode(self, cursor: str) -> List[Any]:
+        payload = decode_cursor(cursor)
+        if payload.get("k") != self.name:
+            raise InvalidCursor("Cursor does not belong to this listing")
+        return self.parse_values(payload.get("v"))
+
+    def parse_values(self, values: Any) -> List[Any]:
+        """Key values as stored in a cursor payload, converted back to column types."""
+        if not isinstance(values, list) or len(values) != len(self.columns):
+            raise InvalidCursor("Invalid cursor")
+        try:
+            return [
+                datetime.fromisoformat(value) if column.type.python_type is datetime else value
+                for column, value in zip(self.columns, values)
+            ]
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor("Invalid cursor") from e
+
+    def next_cursor(self, items: Sequence[Any], limit: int) -> Optional[str]:
+        """Cursor for the page after `items`, or None when this page was the last."""
+        if not items or len(items) < limit:
+            return None
+        return self.encode(items[-1])
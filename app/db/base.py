@@ -3,5 +3,6 @@ from app.db.base_class import Base  # noqa
 # Reorder imports to fix circular dependency issues
 from app.models.user import User  # noqa
 from app.models.maintenance import MaintenanceType, MaintenanceActivity  # noqa
-from app.models.vine import Vine  # noqa
-from app.models.issue import VineIssue  # noqa
\ No newline at end of file
+from app.models.vine import Vine, VineDeletion  # noqa
+from app.models.issue import VineIssue  # noqa
+from app.models.import_job import ImportJob, ImportJobError  # noqa
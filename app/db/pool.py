@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import Histogram
+from app.core.request_context import current_route_label
+
+logger = logging.getLogger(__name__)
+
+
+def pool_budget(
+    pool_size: int, max_overflow: int, max_connections: int, workers: int
+) -> Tuple[int, int]:
+    """
+    Split a total connection budget across uvicorn workers.
+    Each worker process has its own pool, so without this N workers open
+    N * (pool_size + max_overflow) connections. A budget of 0 disables the split.
+    """
+    if max_connections <= 0:
+        return pool_size, max_overflow
+    per_worker = max(1, max_connections // max(1, workers))
+    size = min(pool_size, per_worker)
+    overflow = min(max_overflow, per_worker - size)
+    return size, overflow
+
+
+class PoolMetrics:
+    """Checkout wait times and per-route hold times for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wait = Histogram()
+        self.hold_by_route: Dict[str, Histogram] = {}
+        self.checkouts = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def observe_hold(self, route: str, seconds: float) -> None:
+        histogram = self.hold_by_route.get(route)
+        if histogram is None:
+            with self._lock:
+                histogram = self.hold_by_route.setdefault(route, Histogram())
+        histogram.observe(seconds)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long callers wait for a connection."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.wait.observe(time.perf_counter() - start)
+
+
+# Metrics for every instrumented engine, keyed by name
+registry: Dict[str, Tuple[AsyncEngine, PoolMetrics]] = {}
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> PoolMetrics:
+    """Attach checkout/checkin listeners to an engine built with InstrumentedQueuePool."""
+    metrics = PoolMetrics(name)
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.metrics = metrics
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        metrics.checkouts += 1
+        connection_record.info["checkout_at"] = time.perf_counter()
+        connection_record.info["checkout_route"] = current_route_label()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection: Any, connection_record: Any) -> None:
+        checkout_at = connection_record.info.pop("checkout_at", None)
+        route = connection_record.info.pop("checkout_route", "unknown")
+        if checkout_at is not None:
+            metrics.observe_hold(route, time.perf_counter() - checkout_at)
+
+    registry[name] = (engine, metrics)
+    return metrics
+
+
+def pool_status() -> Dict[str, Any]:
+    """Current pool occupancy plus wait/hold histograms for every instrumented engine."""
+    status: Dict[str, Any] = {}
+    for name, (engine, metrics) in registry.items():
+        pool = engine.sync_engine.pool
+        status[name] = {
+            "pool_size": pool.size(),
+            "max_overflow": getattr(pool, "_max_overflow", None),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # overflow() is negative while the pool hasn't opened pool_size connections yet
+            "overflow_in_use": max(0, pool.overflow()),
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "checkout_wait_seconds": metrics.wait.snapshot(),
+            "hold_seconds_by_route": {
+                route: histogram.snapshot()
+                for route, histogram in sorted(metrics.hold_by_route.items())
+            },
+        }
+    return status
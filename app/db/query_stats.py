@@ -0,0 +1,85 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.request_context import current_route_label
+
+logger = logging.getLogger(__name__)
+
+# Collapse runs of bind placeholders so "IN ($1, $2)" and "IN ($1, $2, $3)" share a shape
+_PLACEHOLDERS = re.compile(r"(?:\$\d+|%\(\w+\)s|\?)(?:\s*,\s*(?:\$\d+|%\(\w+\)s|\?))*")
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDERS.sub("?", " ".join(statement.split()))
+
+
+class QueryStats:
+    """Statements issued while serving one request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.repeated: List[str] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+
+        threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+        if threshold > 0:
+            shape = statement_shape(statement)
+            self.shapes[shape] += 1
+            # Warn once per shape, when it first reaches the threshold
+            if self.shapes[shape] == threshold:
+                self.repeated.append(shape)
+                logger.warning(
+                    f"Possible N+1 on {current_route_label()}: statement ran {threshold} times "
+                    f"in one request: {shape[:300]}"
+                )
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+# Stats for the request being served by the current task (set by RequestContextMiddleware)
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """Count and time every statement the engine runs, per request."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        started_at = getattr(context, "_query_started_at", None)
+        if started_at is None:
+            return
+        elapsed = time.perf_counter() - started_at
+
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.0f} ms) on {current_route_label()}: "
+                f"{' '.join(statement.split())[:500]}"
+            )
@@ -1,58 +1,171 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_scoped_session
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import Request
+from typing import Any, AsyncGenerator, Dict, Optional
+import hashlib
 import logging
 import asyncio
-from asyncio import current_task
+import anyio
+import time
+from contextlib import asynccontextmanager
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, instrument_engine, pool_budget
+from app.db.query_stats import instrument_queries
 
 logger = logging.getLogger(__name__)
 
-# Configure more aggressive connection recycling
-engine = create_async_engine(
-    str(settings.DATABASE_URL), 
-    echo=settings.DEBUG,
-    future=True,
-    pool_pre_ping=True,         # Check if connection is still alive
-    pool_recycle=1800,          # Recycle connections after 30 minutes
-    pool_size=5,                # Reduce pool size to avoid leaks
-    max_overflow=10,            # Allow some overflow
-    pool_timeout=10,            # Timeout for getting a connection from pool - reduced from 20s
-    pool_use_lifo=True,         # Use LIFO (last in, first out) for better performance
-    # Critical fix for "Event loop is closed" errors during garbage collection
-    pool_reset_on_return=None,  # Don't reset connections on return to avoid event loop issues
-    connect_args={
-        "command_timeout": 5,   # Command timeout in seconds
-        # Handle connection termination during shutdown
-        "server_settings": {
-            "application_name": "vineyard_backend",
-            "idle_in_transaction_session_timeout": "5000",  # 5 seconds - reduced from 10s
-            "statement_timeout": "15000",  # Statement timeout in milliseconds (15 sec)
-        }
-    }
+# Each uvicorn worker gets its share of DB_MAX_CONNECTIONS (when set)
+pool_size, max_overflow = pool_budget(
+    settings.DB_POOL_SIZE,
+    settings.DB_MAX_OVERFLOW,
+    settings.DB_MAX_CONNECTIONS,
+    settings.WEB_CONCURRENCY,
 )
 
-# Create a factory for scoped sessions
+
+def _create_engine(url: str, application_name: str) -> AsyncEngine:
+    # Configure more aggressive connection recycling
+    return create_async_engine(
+        url, 
+        echo=settings.DEBUG,
+        future=True,
+        poolclass=InstrumentedQueuePool,  # Records checkout waits for the metrics endpoint
+        pool_pre_ping=True,         # Check if connection is still alive
+        pool_recycle=settings.DB_POOL_RECYCLE,  # Recycle connections (default 30 minutes)
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,  # Timeout for getting a connection from pool
+        pool_use_lifo=True,         # Use LIFO (last in, first out) for better performance
+        # Critical fix for "Event loop is closed" errors during garbage collection
+        pool_reset_on_return=None,  # Don't reset connections on return to avoid event loop issues
+        connect_args={
+            "command_timeout": 5,   # Command timeout in seconds
+            # Handle connection termination during shutdown
+            "server_settings": {
+                "application_name": application_name,
+                "idle_in_transaction_session_timeout": "5000",  # 5 seconds - reduced from 10s
+                "statement_timeout": "15000",  # Statement timeout in milliseconds (15 sec)
+            }
+        }
+    )
+
+
+class PrimarySession(Session):
+    """Sync session class behind primary AsyncSessions; commits feed read-your-writes."""
+
+
+engine = _create_engine(str(settings.DATABASE_URL), "vineyard_backend")
+instrument_engine(engine, "primary")
+instrument_queries(engine)
+
+# Sessions are cheap to create: a session only checks out a pool connection
+# when its first statement runs, and returns it on commit, rollback or close
 async_session_factory = sessionmaker(
     autocommit=False, 
     autoflush=False, 
     bind=engine, 
     class_=AsyncSession,
+    sync_session_class=PrimarySession,
     expire_on_commit=False,
 )
 
-# Use async_scoped_session to create scoped sessions tied to the current task
-AsyncSessionLocal = async_scoped_session(
-    async_session_factory,
-    scopefunc=current_task
+# Optional read replica for read-only endpoints (see get_read_db)
+read_engine: Optional[AsyncEngine] = None
+read_session_factory = None
+if settings.DATABASE_READ_URL:
+    read_engine = _create_engine(str(settings.DATABASE_READ_URL), "vineyard_backend_reader")
+    instrument_engine(read_engine, "replica")
+    instrument_queries(read_engine)
+    read_session_factory = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+# Clients that committed a write recently; their reads stay on the primary.
+# This is per worker process: clients that need a hard guarantee send
+# "X-Read-Consistency: primary".
+recent_writers: TTLCache[bool] = TTLCache(
+    "recent_writers", max_size=10000, ttl=settings.READ_YOUR_WRITES_SECONDS
 )
 
+# Replica health is checked at most once per interval and shared by all requests
+_replica_state = {"usable": False, "lag_seconds": None, "checked_at": float("-inf")}
+_replica_lock = asyncio.Lock()
+
+# Zero when the replica has replayed everything it received, otherwise the age of
+# the last replayed transaction. NULL (not a standby) is treated as no lag.
+REPLICA_LAG_SQL = text(
+    "SELECT COALESCE(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END, 0)"
+)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _remember_writer(session: Session) -> None:
+    client_key = session.info.get("client_key")
+    if client_key:
+        recent_writers.set(client_key, True)
 
-async def get_db() -> AsyncSession:
+
+def client_key(request: Request) -> str:
+    """Identify the client behind a request for read-your-writes routing."""
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+    return request.client.host if request.client else "anonymous"
+
+
+async def _replica_lag() -> float:
+    async with read_engine.connect() as connection:
+        return float((await connection.execute(REPLICA_LAG_SQL)).scalar() or 0)
+
+
+async def replica_usable() -> bool:
     """
-    Dependency function that yields db sessions
+    Whether reads may go to the replica: it is configured, reachable and within
+    READ_REPLICA_MAX_LAG_SECONDS of the primary.
     """
-    session = AsyncSessionLocal()
+    if read_engine is None:
+        return False
+    if time.monotonic() - _replica_state["checked_at"] < settings.READ_REPLICA_CHECK_INTERVAL_SECONDS:
+        return _replica_state["usable"]
+
+    async with _replica_lock:
+        # Another request may have refreshed the state while we waited
+        if time.monotonic() - _replica_state["checked_at"] < settings.READ_REPLICA_CHECK_INTERVAL_SECONDS:
+            return _replica_state["usable"]
+        try:
+            # Keep an unreachable replica from stalling the requests waiting on this check
+            lag = await asyncio.wait_for(_replica_lag(), timeout=2.0)
+            usable = lag <= settings.READ_REPLICA_MAX_LAG_SECONDS
+            if not usable:
+                logger.warning(f"Read replica is {lag:.1f}s behind, routing reads to the primary")
+        except Exception as e:
+            lag = None
+            usable = False
+            logger.warning(f"Read replica unavailable, routing reads to the primary: {str(e)}")
+        _replica_state.update(usable=usable, lag_seconds=lag, checked_at=time.monotonic())
+        return usable
+
+
+def replica_status() -> Dict[str, Any]:
+    """Last replica health check, for the metrics endpoint."""
+    return {
+        "configured": read_engine is not None,
+        "usable": _replica_state["usable"],
+        "lag_seconds": _replica_state["lag_seconds"],
+        "recent_writers": len(recent_writers),
+    }
+
+
+@asynccontextmanager
+async def _close_on_exit(session: AsyncSession) -> AsyncGenerator[AsyncSession, None]:
     try:
         yield session
     except Exception as e:
@@ -65,9 +178,87 @@ async def get_db() -> AsyncSession:
             logger.debug("Database session closed successfully")
         except Exception as e:
             logger.error(f"Error closing database session: {str(e)}")
-        finally:
-            # Explicitly remove it from the registry
-            AsyncSessionLocal.remove()
+
+
+@asynccontextmanager
+async def _primary_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    The request's primary session, created on first use and shared by every
+    dependency of the request. Only the dependency that created it closes it.
+    """
+    session = getattr(request.state, "db", None)
+    if session is not None:
+        yield session
+        return
+
+    session = async_session_factory(info={"client_key": client_key(request)})
+    request.state.db = session
+    try:
+        async with _close_on_exit(session):
+            yield session
+    finally:
+        request.state.db = None
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency function that yields the request's db session.
+    No connection is held until the first query, so requests answered from
+    caches, or rejected before they query, never touch the pool.
+    """
+    async with _primary_session(request) as session:
+        yield session
+
+
+async def _use_replica(request: Request) -> bool:
+    return (
+        request.headers.get("x-read-consistency", "").lower() != "primary"
+        and recent_writers.get(client_key(request)) is None
+        and await replica_usable()
+    )
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only endpoints. Uses the read replica when one is
+    configured and healthy, unless the client asked for primary reads or
+    wrote something within the last READ_YOUR_WRITES_SECONDS; otherwise it
+    shares the request's primary session.
+    """
+    if await _use_replica(request):
+        async with _close_on_exit(read_session_factory()) as session:
+            yield session
+    else:
+        async with _primary_session(request) as session:
+            yield session
+
+
+@asynccontextmanager
+async def export_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    A session of its own for a long streaming read. A StreamingResponse body
+    runs after the request's dependencies have finished, so it can't use
+    theirs. Picks the replica by the same rules as get_read_db, and replaces
+    the engine's statement and idle-in-transaction timeouts with the
+    EXPORT_* ones for its transaction.
+    """
+    factory = read_session_factory if await _use_replica(request) else async_session_factory
+    session = factory()
+    try:
+        # SET can't take bind parameters; both values are integers from settings
+        await session.execute(
+            text(f"SET LOCAL statement_timeout = {int(settings.EXPORT_STATEMENT_TIMEOUT_SECONDS * 1000)}")
+        )
+        # The transaction sits idle while a slow client drains the response
+        await session.execute(
+            text(f"SET LOCAL idle_in_transaction_session_timeout = {int(settings.EXPORT_IDLE_TIMEOUT_SECONDS * 1000)}")
+        )
+        yield session
+    finally:
+        # A client disconnecting mid-export cancels the stream; shield the close
+        # so the connection still goes back to the pool
+        with anyio.CancelScope(shield=True):
+            await session.close()
 
 
 # Define a function to close the SQLAlchemy connection pool on shutdown
@@ -75,11 +266,10 @@ async def close_db_connection():
     """Close all connections in the pool on application shutdown."""
     logger.info("Closing database connections...")
     try:
-        # First remove all sessions from the registry
-        AsyncSessionLocal.remove()
-        
         # Set a short timeout for connection closure
         await asyncio.wait_for(engine.dispose(), timeout=5.0)
+        if read_engine is not None:
+            await asyncio.wait_for(read_engine.dispose(), timeout=5.0)
         logger.info("Database connections closed successfully.")
     except asyncio.TimeoutError:
         logger.warning("Timeout while closing database connections")
@@ -91,14 +281,3 @@ async def close_db_connection():
             logger.error(f"RuntimeError closing connections: {str(e)}")
     except Exception as e:
         logger.error(f"Error closing database connections: {str(e)}")
-        
-# Create a sync version for use during garbage collection or sync contexts
-def sync_close_db_connection():
-    """Synchronous version of close_db_connection for use in sync contexts."""
-    logger.info("Synchronously closing database connections...")
-    try:
-        # Just remove all sessions from the registry
-        AsyncSessionLocal.remove()
-        logger.info("Session registry cleared.")
-    except Exception as e:
-        logger.error(f"Error clearing session registry: {str(e)}")
\ No newline at end of file
@@ -1,7 +1,8 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import logging
@@ -11,6 +12,9 @@ from datetime import datetime
 
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.core.middleware import RequestContextMiddleware
+from app.core.workers import shutdown_worker_pools
+from app.crud.pagination import InvalidCursor
 from app.db.session import close_db_connection
 
 # Configure logging
@@ -32,8 +36,17 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing", "X-Next-Cursor"],
     )
 
+# Make the current request visible to pool and query instrumentation
+app.add_middleware(RequestContextMiddleware)
+
+# Tampered, stale or foreign pagination cursors are a client error
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -118,6 +131,9 @@ async def on_shutdown():
     except Exception as e:
         logger.error(f"Error during shutdown cleanup: {e}")
     
+    # Stop the process/thread pools used for CPU-heavy work
+    shutdown_worker_pools()
+    
     logger.info("Shutdown cleanup completed")
 
 
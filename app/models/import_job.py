@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Identity, Index, Integer, String, Text
+
+from app.db.base_class import Base
+
+
+class ImportJob(Base):
+    """
+    A CSV import of vines, maintenance activities or issues. The upload is
+    loaded in a background task; clients poll the job for its status and
+    counts, and read the row-level problems from import_job_errors.
+    """
+    __tablename__ = "import_jobs"
+
+    id = Column("job_id", Integer, primary_key=True, index=True)
+    # "vines", "maintenance" or "issues"
+    kind = Column(String, nullable=False)
+    filename = Column(String, nullable=True)
+    # queued -> copying -> validating -> merging -> succeeded | failed
+    status = Column(String, default="queued", nullable=False)
+    # Vines only: "error" reports vines that already exist, "update" overwrites them
+    on_conflict = Column(String, default="error", nullable=False)
+    # When set, a file with any invalid row imports nothing
+    atomic = Column(Boolean, default=False, nullable=False)
+    total_rows = Column(Integer, nullable=True)
+    error_rows = Column(Integer, nullable=True)
+    inserted_rows = Column(Integer, nullable=True)
+    updated_rows = Column(Integer, nullable=True)
+    # Why the job failed, when it did
+    message = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class ImportJobError(Base):
+    """One problem with one row of an import; row_number counts the header as row 1."""
+    __tablename__ = "import_job_errors"
+
+    id = Column("error_id", BigInteger, Identity(), primary_key=True)
+    job_id = Column(Integer, ForeignKey("import_jobs.job_id", ondelete="CASCADE"), nullable=False)
+    row_number = Column(Integer, nullable=False)
+    message = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_import_job_errors_job_id_row_number", job_id, row_number),
+    )
@@ -1,8 +1,10 @@
 from datetime import datetime
+import hashlib
 import os
+from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, LargeBinary
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text, LargeBinary
+from sqlalchemy.orm import backref, deferred, relationship
 
 from app.db.base_class import Base
 
@@ -15,8 +17,9 @@ class VineIssue(Base):
     description = Column("issue_description", Text, nullable=False)
     # Path to the stored image file - we'll use this for the relative path to the image
     photo_path = Column(String, nullable=True)
-    # Keep photo_data for backward compatibility
-    photo_data = Column(LargeBinary, nullable=True)
+    # Keep photo_data for backward compatibility; deferred so listings never pull the blob,
+    # use crud_issue.issue.get_with_photo when it's actually needed
+    photo_data = deferred(Column(LargeBinary, nullable=True), raiseload=True)
     # Image MIME type
     photo_content_type = Column(String, nullable=True)
     date_reported = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -27,16 +30,41 @@ class VineIssue(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Keyset pagination indexes for the newest-first issue listings
+    __table_args__ = (
+        Index("ix_vine_issues_date_reported_issue_id", date_reported, id),
+        Index("ix_vine_issues_vine_id_date_reported", vine_id, date_reported, id),
+        Index("ix_vine_issues_is_resolved_date_reported", is_resolved, date_reported, id),
+        # Photos are shared by content; counts the issues still referring to one
+        Index("ix_vine_issues_photo_path", photo_path, postgresql_where=photo_path.isnot(None)),
+    )
+    
     # Relationships
     vine = relationship("Vine", backref=backref("issues", cascade="all, delete-orphan"))
     reporter = relationship("User", foreign_keys=[reported_by], backref=backref("reported_issues"))
     resolver = relationship("User", foreign_keys=[resolved_by], backref=backref("resolved_issues"))
     
+    @property
+    def photo_version(self) -> Optional[str]:
+        """
+        Short hash of the stored photo's path. Photos are stored by content
+        hash, so it changes whenever the photo does.
+        """
+        if not self.photo_path:
+            return None
+        return hashlib.sha1(self.photo_path.encode()).hexdigest()[:12]
+    
+    @property
+    def photo_url(self) -> Optional[str]:
+        # Read by the Issue schema (from_attributes)
+        return self.get_photo_url()
+    
     def get_photo_url(self) -> str:
         """
-        Generate a URL for the photo if available
+        Generate a URL for the photo if available. The version parameter makes
+        the URL change with the photo, so clients can cache it indefinitely.
         """
         if self.photo_path:
             # Convert the path to a URL
-            return f"/api/v1/issues/{self.id}/photo"
+            return f"/api/v1/issues/{self.id}/photo?v={self.photo_version}"
         return None
\ No newline at end of file
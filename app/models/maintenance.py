@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship, backref
 
 from app.db.base_class import Base
@@ -26,6 +26,12 @@ class MaintenanceActivity(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # Keyset pagination indexes for the most-recent-first activity listings
+    __table_args__ = (
+        Index("ix_maintenance_activities_activity_date_activity_id", activity_date, id),
+        Index("ix_maintenance_activities_vine_id_activity_date", vine_id, activity_date, id),
+    )
+    
     # Relationships
     vine = relationship("Vine", backref=backref("maintenance_activities", cascade="all, delete-orphan"))
     type = relationship("MaintenanceType", backref=backref("activities"))
\ No newline at end of file
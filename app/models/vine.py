@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Identity, Index, Integer, String
 from sqlalchemy.orm import relationship, backref
 
 from app.db.base_class import Base
@@ -23,4 +23,50 @@ class Vine(Base):
     is_dead = Column(Boolean, default=False, nullable=False)
     date_died = Column(DateTime, nullable=True)
     record_created = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Id of the transaction that last wrote the row, set by the vine_inventory_stamp_change_xid
+    # trigger; orders the change feed by commit rather than by updated_at
+    change_xid = Column(BigInteger, server_default="0", nullable=False)
+    
+    # pg_trgm GIN indexes so substring search (LIKE/ILIKE '%term%') doesn't scan the table
+    __table_args__ = tuple(
+        Index(
+            f"ix_vine_inventory_{name}_trgm",
+            name,
+            postgresql_using="gin",
+            postgresql_ops={name: "gin_trgm_ops"},
+        )
+        for name in ("alpha_numeric_id", "variety", "vineyard_name", "field_name")
+    ) + (
+        # Change feed order for GET /vines/changes
+        Index("ix_vine_inventory_change_xid_vine_id", change_xid, id),
+        # Location lookups; also covers field layout grids and their version checks,
+        # so those are index-only scans
+        Index(
+            "ix_vine_inventory_field_location",
+            field_name,
+            row_number,
+            spot_number,
+            postgresql_include=["vine_id", "is_dead", "change_xid"],
+        ),
+    )
+
+
+class VineDeletion(Base):
+    """
+    Tombstone for a deleted vine, so offline clients can drop it from their copy.
+    Rows are written by the vine_inventory_log_deletion trigger, which catches
+    every delete path, not only the API.
+    """
+    __tablename__ = "vine_deletions"
+    
+    id = Column("deletion_id", BigInteger, Identity(), primary_key=True)
+    vine_id = Column(Integer, nullable=False)
+    alpha_numeric_id = Column(String, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Id of the deleting transaction (see Vine.change_xid)
+    change_xid = Column(BigInteger, server_default="0", nullable=False)
+    
+    __table_args__ = (
+        Index("ix_vine_deletions_change_xid_deletion_id", change_xid, id),
+    )
\ No newline at end of file
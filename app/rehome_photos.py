@@ -0,0 +1,155 @@
+"""
+Move issue photos into the content-addressed store.
+
+Photos uploaded before the store existed live under YYYY/MM/issue_<timestamp>_<id>.<ext>.
+Each one is hashed and linked to its content path (cas/ab/cd/<sha256>.<ext>), which
+also merges identical photos into one file. Every issue using it is switched over
+in one UPDATE, and then the old file and its variants are moved or removed. It is
+safe to run while the API is up, and to run again.
+
+    python -m app.rehome_photos            # rehome legacy photos
+    python -m app.rehome_photos --dry-run  # only report what would be done
+    python -m app.rehome_photos --gc       # also delete photos no issue uses
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Set
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.session import async_session_factory, engine
+from app.models.issue import VineIssue
+from app.utils.image_utils import (
+    CAS_DIR,
+    PHOTO_VARIANTS,
+    UPLOAD_DIR,
+    content_path,
+    delete_stored_photo,
+    discard_file,
+    file_sha256,
+    get_variant_path,
+    is_content_path,
+)
+
+
+def _link_content(source: Path, target: Path) -> bool:
+    """Hard-link `source` at its content path. Returns False if that content was already stored."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+        return True
+    except FileExistsError:
+        return False
+
+
+def _move_variants(old_path: str, new_path: str) -> None:
+    # Variants are named after the photo path; keep them rather than render them again
+    for size in PHOTO_VARIANTS:
+        old_variant = UPLOAD_DIR / get_variant_path(old_path, size)
+        new_variant = UPLOAD_DIR / get_variant_path(new_path, size)
+        if not old_variant.exists():
+            continue
+        if new_variant.exists():
+            discard_file(str(old_variant))
+        else:
+            new_variant.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(old_variant, new_variant)
+
+
+async def rehome_photos(dry_run: bool = False) -> None:
+    async with async_session_factory() as db:
+        result = await db.execute(
+            select(VineIssue.photo_path)
+            .filter(VineIssue.photo_path.isnot(None))
+            .distinct()
+        )
+        legacy_paths = [path for path in result.scalars() if not is_content_path(path)]
+        print(f"{len(legacy_paths)} photo files to rehome")
+
+        moved = merged = missing = 0
+        for old_path in legacy_paths:
+            source = UPLOAD_DIR / old_path
+            if not source.is_file():
+                print(f"Missing: {old_path}")
+                missing += 1
+                continue
+            new_path = str(content_path(file_sha256(source), source.suffix.lower()))
+            if dry_run:
+                print(f"{old_path} -> {new_path}")
+                continue
+
+            # Link first, so the photo stays readable under one path or the other throughout
+            if _link_content(source, UPLOAD_DIR / new_path):
+                moved += 1
+            else:
+                merged += 1
+            await db.execute(
+                update(VineIssue)
+                .where(VineIssue.photo_path == old_path)
+                .values(photo_path=new_path)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            _move_variants(old_path, new_path)
+            discard_file(str(source))
+
+        if not dry_run:
+            print(f"Rehomed {moved} photos, merged {merged} duplicates, {missing} missing")
+
+
+async def collect_garbage(dry_run: bool = False) -> None:
+    """
+    Delete content store photos that no issue refers to: left by deletes made
+    outside the API, or kept back by the grace period when released.
+    """
+    async with async_session_factory() as db:
+        result = await db.execute(
+            select(VineIssue.photo_path)
+            .filter(VineIssue.photo_path.startswith(f"{CAS_DIR}/"))
+            .distinct()
+        )
+        referenced: Set[str] = set(result.scalars())
+
+    grace_seconds = settings.PHOTO_GC_GRACE_SECONDS
+    removed = kept = 0
+    for file_path in sorted((UPLOAD_DIR / CAS_DIR).rglob("*")):
+        relative_path = str(file_path.relative_to(UPLOAD_DIR))
+        if not file_path.is_file() or relative_path in referenced:
+            continue
+        if dry_run:
+            recent = time.time() - file_path.stat().st_mtime < grace_seconds
+            print(f"Unreferenced: {relative_path}{' (recent, kept)' if recent else ''}")
+        elif delete_stored_photo(relative_path, grace_seconds):
+            removed += 1
+        else:
+            kept += 1
+
+    if not dry_run:
+        print(f"Removed {removed} unreferenced photos, kept {kept} used in the last {grace_seconds}s")
+
+
+async def main(dry_run: bool, gc: bool) -> None:
+    try:
+        await rehome_photos(dry_run)
+        if gc:
+            await collect_garbage(dry_run)
+    finally:
+        # Dispose the engine to close all connections
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="report without changing anything")
+    parser.add_argument("--gc", action="store_true", help="delete photos no issue refers to")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.dry_run, args.gc))
+    except Exception as e:
+        print(f"Fatal error rehoming photos: {e}")
+        sys.exit(1)
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+ImportKind = Literal["vines", "maintenance", "issues"]
+
+
+class ImportJobCreate(BaseModel):
+    kind: ImportKind
+    filename: Optional[str] = None
+    on_conflict: Literal["error", "update"] = "error"
+    atomic: bool = False
+    created_by: int
+
+
+class ImportJobUpdate(BaseModel):
+    status: Optional[str] = None
+    total_rows: Optional[int] = None
+    error_rows: Optional[int] = None
+    inserted_rows: Optional[int] = None
+    updated_rows: Optional[int] = None
+    message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+# Properties to return to client
+class ImportJob(BaseModel):
+    id: int
+    kind: ImportKind
+    filename: Optional[str] = None
+    status: Literal["queued", "copying", "validating", "merging", "succeeded", "failed"]
+    on_conflict: Literal["error", "update"]
+    atomic: bool
+    # Filled in as the job moves through its stages
+    total_rows: Optional[int] = None
+    error_rows: Optional[int] = None
+    inserted_rows: Optional[int] = None
+    updated_rows: Optional[int] = None
+    message: Optional[str] = None
+    created_by: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {
+        'from_attributes': True
+    }
+
+
+class ImportJobError(BaseModel):
+    # Spreadsheet row number; the header is row 1
+    row_number: int
+    message: str
+
+    model_config = {
+        'from_attributes': True
+    }
+
+
+class ImportJobErrors(BaseModel):
+    job_id: int
+    # Distinct rows with at least one problem
+    error_rows: int
+    errors: List[ImportJobError]
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Dict, Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+# Every stats response says how fresh its numbers are
+class StatsResponse(BaseModel, Generic[T]):
+    # Start of the oldest refresh the numbers come from; None if never refreshed
+    refreshed_at: Optional[datetime] = None
+    items: List[T]
+
+
+class VineCounts(BaseModel):
+    total: int
+    alive: int
+    dead: int
+
+
+class VineCountsByVariety(VineCounts):
+    variety: Optional[str] = None
+
+
+class VineCountsByRootstock(VineCounts):
+    rootstock: Optional[str] = None
+
+
+class VineCountsByField(VineCounts):
+    vineyard_name: Optional[str] = None
+    field_name: Optional[str] = None
+
+
+class VineCountsByPlantingYear(VineCounts):
+    year_of_planting: Optional[int] = None
+
+
+class DeathsInMonth(BaseModel):
+    month: datetime
+    deaths: int
+
+
+class MortalityStats(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    total: int
+    dead: int
+    # dead / total, or None when there are no vines
+    mortality_rate: Optional[float] = None
+    deaths_by_month: List[DeathsInMonth]
+
+
+class OpenIssuesByField(BaseModel):
+    vineyard_name: Optional[str] = None
+    field_name: Optional[str] = None
+    open_issues: int
+    vines_affected: int
+
+
+class ActivitiesInMonth(BaseModel):
+    type_id: int
+    type_name: str
+    month: datetime
+    activities: int
+
+
+class StatsStatus(BaseModel):
+    # Last refresh of each view
+    views: Dict[str, Optional[datetime]]
+    # Views this worker will refresh shortly
+    pending: List[str]
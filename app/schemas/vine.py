@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -63,8 +63,73 @@ class VineInDB(VineInDBBase):
     pass
 
 
-# For search and filter functionality
-class VineSearchParams(BaseModel):
+# A deleted vine, reported by the change feed
+class VineTombstone(BaseModel):
+    id: int
+    alpha_numeric_id: str
+    deleted_at: datetime
+
+
+class VineChanges(BaseModel):
+    # Vines created or updated since the cursor, oldest change first
+    changed: List[Vine]
+    deleted: List[VineTombstone]
+    # Pass back as `since` on the next poll
+    next_cursor: str
+    # True when more changes are waiting; poll again straight away
+    has_more: bool
+
+
+# Outcome of one item in a batch sync, in request order
+class VineSyncResult(BaseModel):
+    index: int
+    alpha_numeric_id: str
+    id: Optional[int] = None
+    status: Literal["created", "updated", "error"]
+    error: Optional[str] = None
+
+
+class VineSyncBatchResult(BaseModel):
+    results: List[VineSyncResult]
+    created: int
+    updated: int
+    failed: int
+    elapsed_ms: float
+    items_per_second: float
+
+
+# One row of a field layout; see app/utils/field_layout.py for the encoding
+class VineFieldLayoutRow(BaseModel):
+    row: int
+    first_spot: int
+    length: int
+    # Base64 little-endian uint32 vine ids, one per spot, 0 where the spot is empty
+    ids: str
+    # Base64 bitmaps, one bit per spot
+    alive: str
+    dead: str
+
+
+# More than one vine recorded at the same spot
+class VineFieldLayoutConflict(BaseModel):
+    row: int
+    spot: int
+    ids: List[int]
+
+
+class VineFieldLayout(BaseModel):
+    field_name: str
+    version: str
+    vine_count: int
+    dead_count: int
+    rows: List[VineFieldLayoutRow]
+    conflicts: List[VineFieldLayoutConflict]
+    # Vines in the field without a row and spot
+    unplaced: List[int]
+
+
+# Filters shared by search and export
+class VineFilters(BaseModel):
     alpha_numeric_id: Optional[str] = None
     variety: Optional[str] = None
     vineyard_name: Optional[str] = None
@@ -73,5 +138,34 @@ class VineSearchParams(BaseModel):
     is_dead: Optional[bool] = None
     year_min: Optional[int] = None
     year_max: Optional[int] = None
+    # Text filters are substring matches; set to False for ILIKE matching
+    case_sensitive: bool = True
+
+
+# For search and filter functionality
+class VineSearchParams(VineFilters):
     page: int = 1
-    items_per_page: int = 10
\ No newline at end of file
+    items_per_page: int = 10
+    # include_total=False skips counting and only reports has_next.
+    # count_mode: "exact" counts in the page query (count(*) OVER ()), "estimate" uses
+    # the planner's row estimate, and "auto" estimates only when the filters are broad
+    include_total: bool = True
+    count_mode: Literal["exact", "estimate", "auto"] = "exact"
+
+# PATCH /vines/bulk: the vines to change (exactly one of ids and filters) and the change
+class VineBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = None
+    filters: Optional[VineFilters] = None
+    # Only the fields sent are written
+    patch: VineUpdate
+    # Count the matching vines without changing them
+    dry_run: bool = False
+    # Nothing is changed if more vines than this match (at most VINE_BULK_MAX_ROWS)
+    max_affected: Optional[int] = Field(None, ge=1)
+
+
+class VineBulkUpdateResult(BaseModel):
+    matched: int
+    dry_run: bool
+    # Ids of the updated vines; empty on a dry run
+    updated_ids: List[int]
@@ -0,0 +1,371 @@
+"""
+Bulk CSV imports of vines, maintenance activities and issues.
+
+An upload is COPYed into a temporary staging table of text columns, checked
+by set-based queries that record every problem in import_job_errors, and the
+valid rows are merged into the real table with one INSERT ... SELECT. The
+load runs in a single transaction on the raw asyncpg connection (COPY isn't
+available through SQLAlchemy). Progress is written to the job row from
+separate sessions, so pollers see it while the load is still running.
+"""
+import csv
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud.crud_import import import_job as crud_import_job
+from app.crud.crud_stats import stats_refresher
+from app.crud.crud_vine import vine as crud_vine
+from app.db.session import async_session_factory, engine
+from app.models.import_job import ImportJob
+
+logger = logging.getLogger(__name__)
+
+STAGE_TABLE = "import_stage"
+# Imports run one at a time across all workers, so two files touching the same
+# vines can't deadlock each other; later jobs stay "queued" until it's their turn
+IMPORT_LOCK_KEY = int.from_bytes(b"imports", "big")
+# When the merge started, not when it commits; nothing orders by it (the change
+# feed uses change_xid, stamped by trigger)
+NOW_UTC = "statement_timestamp() AT TIME ZONE 'utc'"
+# At most nine digits, so every match fits in an integer column
+INTEGER_PATTERN = "^[+-]?[0-9]{1,9}$"
+TRUE_VALUES = ("true", "t", "yes", "y", "1")
+FALSE_VALUES = ("false", "f", "no", "n", "0")
+
+
+class ImportColumn(NamedTuple):
+    name: str
+    # "text", "integer", "boolean" or "timestamp"
+    type: str = "text"
+    required: bool = False
+    # SQL used when the cell is blank or the column is left out of the file
+    default: Optional[str] = None
+
+
+IMPORT_COLUMNS: Dict[str, Tuple[ImportColumn, ...]] = {
+    "vines": (
+        ImportColumn("alpha_numeric_id", required=True),
+        ImportColumn("year_of_planting", "integer"),
+        ImportColumn("nursery"),
+        ImportColumn("variety"),
+        ImportColumn("rootstock"),
+        ImportColumn("vineyard_name"),
+        ImportColumn("field_name"),
+        ImportColumn("row_number", "integer"),
+        ImportColumn("spot_number", "integer"),
+        ImportColumn("is_dead", "boolean", default="false"),
+        ImportColumn("date_died", "timestamp"),
+    ),
+    "maintenance": (
+        ImportColumn("alpha_numeric_id", required=True),
+        ImportColumn("type_id", "integer", required=True),
+        ImportColumn("activity_date", "timestamp", required=True),
+        ImportColumn("notes"),
+    ),
+    "issues": (
+        ImportColumn("alpha_numeric_id", required=True),
+        ImportColumn("description", required=True),
+        ImportColumn("date_reported", "timestamp", default=NOW_UTC),
+        ImportColumn("is_resolved", "boolean", default="false"),
+        ImportColumn("date_resolved", "timestamp"),
+    ),
+}
+
+
+async def save_upload(upload: UploadFile) -> str:
+    """
+    Copy an upload to a temporary file that outlives the request, for the
+    background job to read. Raises 413 past IMPORT_MAX_BYTES.
+    """
+    fd, path = tempfile.mkstemp(suffix=".csv", dir=settings.IMPORT_TMP_DIR)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Import files are limited to {settings.IMPORT_MAX_BYTES} bytes",
+                    )
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def read_header(path: str) -> List[str]:
+    # utf-8-sig drops the byte order mark spreadsheet programs put in front of the header
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [name.strip().lower() for name in next(csv.reader(f), [])]
+
+
+def header_problems(kind: str, path: str) -> List[str]:
+    """Reasons the file's header can't be imported as `kind`; empty when it can."""
+    try:
+        header = read_header(path)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return [f"The file is not a UTF-8 CSV file: {str(e)}"]
+    if not header:
+        return ["The file is empty"]
+
+    columns = IMPORT_COLUMNS[kind]
+    known = {column.name for column in columns}
+    problems = []
+    unknown = [name for name in header if name not in known]
+    if unknown:
+        problems.append(
+            f"Unknown columns: {', '.join(unknown)} (expected {', '.join(c.name for c in columns)})"
+        )
+    repeated = sorted({name for name in header if header.count(name) > 1})
+    if repeated:
+        problems.append(f"Repeated columns: {', '.join(repeated)}")
+    missing = [column.name for column in columns if column.required and column.name not in header]
+    if missing:
+        problems.append(f"Missing required columns: {', '.join(missing)}")
+    return problems
+
+
+def _sql_list(values: Tuple[str, ...]) -> str:
+    return "(" + ", ".join(f"'{value}'" for value in values) + ")"
+
+
+def _cell(name: str) -> str:
+    return f"NULLIF(trim(s.{name}), '')"
+
+
+def _value(column: ImportColumn, header: List[str]) -> str:
+    """SQL converting a staged cell to its column type; only validated rows reach it."""
+    if column.name not in header:
+        return column.default or "NULL"
+    cell = _cell(column.name)
+    if column.type == "integer":
+        value = f"{cell}::integer"
+    elif column.type == "boolean":
+        value = f"lower({cell}) IN {_sql_list(TRUE_VALUES)}"
+    elif column.type == "timestamp":
+        value = f"{cell}::timestamp"
+    else:
+        value = cell
+    return f"COALESCE({value}, {column.default})" if column.default else value
+
+
+def _problem(condition: str, message: str) -> str:
+    return f"SELECT s.line_no, {message} AS message FROM {STAGE_TABLE} s WHERE {condition}"
+
+
+def _validation_sql(job: ImportJob, header: List[str]) -> str:
+    """One INSERT recording every problem with every row in import_job_errors."""
+    problems = []
+    for column in IMPORT_COLUMNS[job.kind]:
+        if column.name not in header:
+            continue
+        cell = _cell(column.name)
+        if column.required:
+            problems.append(_problem(f"{cell} IS NULL", f"'{column.name} is required'"))
+        if column.type == "integer":
+            problems.append(_problem(
+                f"{cell} !~ '{INTEGER_PATTERN}'",
+                f"format('{column.name}: %L is not a whole number', {cell})",
+            ))
+        elif column.type == "boolean":
+            problems.append(_problem(
+                f"lower({cell}) NOT IN {_sql_list(TRUE_VALUES + FALSE_VALUES)}",
+                f"format('{column.name}: %L is not true or false', {cell})",
+            ))
+        elif column.type == "timestamp":
+            problems.append(_problem(
+                f"{cell} IS NOT NULL AND import_try_timestamp({cell}) IS NULL",
+                f"format('{column.name}: %L is not a date', {cell})",
+            ))
+
+    alpha_id = _cell("alpha_numeric_id")
+    if job.kind == "vines":
+        problems.append(
+            "SELECT d.line_no, format('alpha_numeric_id %L repeats row %s', d.alpha_id, d.first_line + 1) "
+            "FROM (SELECT line_no, trim(alpha_numeric_id) AS alpha_id, "
+            "min(line_no) OVER (PARTITION BY trim(alpha_numeric_id)) AS first_line "
+            f"FROM {STAGE_TABLE} WHERE NULLIF(trim(alpha_numeric_id), '') IS NOT NULL) d "
+            "WHERE d.line_no > d.first_line"
+        )
+        if job.on_conflict == "error":
+            problems.append(_problem(
+                f"EXISTS (SELECT 1 FROM vine_inventory v WHERE v.alpha_numeric_id = {alpha_id})",
+                f"format('vine %L already exists', {alpha_id})",
+            ))
+    else:
+        problems.append(_problem(
+            f"{alpha_id} IS NOT NULL "
+            f"AND NOT EXISTS (SELECT 1 FROM vine_inventory v WHERE v.alpha_numeric_id = {alpha_id})",
+            f"format('vine %L does not exist', {alpha_id})",
+        ))
+    if job.kind == "maintenance":
+        type_id = _cell("type_id")
+        # CASE, because AND doesn't guarantee the pattern is checked before the cast
+        problems.append(_problem(
+            f"CASE WHEN {type_id} ~ '{INTEGER_PATTERN}' THEN NOT EXISTS "
+            f"(SELECT 1 FROM maintenance_types t WHERE t.type_id = {type_id}::integer) ELSE false END",
+            f"format('unknown type_id %s', {type_id})",
+        ))
+
+    return (
+        "INSERT INTO import_job_errors (job_id, row_number, message) "
+        f"SELECT $1::integer, p.line_no + 1, p.message FROM ({' UNION ALL '.join(problems)}) p"
+    )
+
+
+# Rows with no recorded problem
+VALID_ROW = (
+    "NOT EXISTS (SELECT 1 FROM import_job_errors e "
+    "WHERE e.job_id = $1 AND e.row_number = s.line_no + 1)"
+)
+
+
+def _merge_sql(job: ImportJob, header: List[str]) -> Tuple[str, List[Any]]:
+    """
+    The INSERT ... SELECT of the valid staged rows, wrapped to return the
+    (inserted, updated) counts, and its arguments. Timestamps the ORM would
+    fill in are set here. The change feed doesn't rely on them: the
+    vine_inventory trigger stamps each vine with the import's transaction,
+    so clients get imported vines once it commits, however long it ran.
+    """
+    columns = {column.name: column for column in IMPORT_COLUMNS[job.kind]}
+    if job.kind == "vines":
+        names = [name for name, column in columns.items() if name in header or column.default]
+        insert = (
+            f"INSERT INTO vine_inventory ({', '.join(names)}, record_created, updated_at) "
+            f"SELECT {', '.join(_value(columns[name], header) for name in names)}, {NOW_UTC}, {NOW_UTC} "
+            f"FROM {STAGE_TABLE} s WHERE {VALID_ROW}"
+        )
+        if job.on_conflict == "update":
+            # Like the sync endpoints, only the columns in the file overwrite existing values
+            changes = [
+                f"{name} = EXCLUDED.{name}" for name in names
+                if name in header and name != "alpha_numeric_id"
+            ]
+            changes.append("updated_at = EXCLUDED.updated_at")
+            insert += f" ON CONFLICT (alpha_numeric_id) DO UPDATE SET {', '.join(changes)}"
+        # xmax is 0 for a freshly inserted row version and set for an updated one
+        insert += " RETURNING (xmax = 0) AS inserted"
+        args: List[Any] = [job.id]
+    elif job.kind == "maintenance":
+        insert = (
+            "INSERT INTO maintenance_activities "
+            "(vine_id, type_id, activity_date, notes, created_at, updated_at) "
+            f"SELECT v.vine_id, {_value(columns['type_id'], header)}, "
+            f"{_value(columns['activity_date'], header)}, {_value(columns['notes'], header)}, "
+            f"{NOW_UTC}, {NOW_UTC} "
+            f"FROM {STAGE_TABLE} s JOIN vine_inventory v ON v.alpha_numeric_id = {_cell('alpha_numeric_id')} "
+            f"WHERE {VALID_ROW} RETURNING true AS inserted"
+        )
+        args = [job.id]
+    else:
+        is_resolved = _value(columns["is_resolved"], header)
+        insert = (
+            "INSERT INTO vine_issues (vine_id, issue_description, date_reported, reported_by, "
+            "is_resolved, date_resolved, resolved_by, created_at, updated_at) "
+            f"SELECT v.vine_id, {_value(columns['description'], header)}, "
+            f"{_value(columns['date_reported'], header)}, $2::integer, {is_resolved}, "
+            f"{_value(columns['date_resolved'], header)}, CASE WHEN {is_resolved} THEN $2::integer END, "
+            f"{NOW_UTC}, {NOW_UTC} "
+            f"FROM {STAGE_TABLE} s JOIN vine_inventory v ON v.alpha_numeric_id = {_cell('alpha_numeric_id')} "
+            f"WHERE {VALID_ROW} RETURNING true AS inserted"
+        )
+        args = [job.id, job.created_by]
+    sql = (
+        f"WITH merged AS ({insert}) "
+        "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged"
+    )
+    return sql, args
+
+
+async def _set_progress(job_id: int, **fields: Any) -> None:
+    # A session of its own, committed at once, so pollers see it mid-load
+    async with async_session_factory() as db:
+        await crud_import_job.update_by_id(db, id=job_id, obj_in=fields)
+
+
+async def _load(connection: Any, job: ImportJob, header: List[str], path: str) -> Dict[str, Any]:
+    """Stage, validate and merge the file in one transaction; returns the job's final fields."""
+    # The engine's 5s command_timeout and 15s statement_timeout are for API queries;
+    # every statement here passes IMPORT_TIMEOUT_SECONDS instead
+    timeout = settings.IMPORT_TIMEOUT_SECONDS
+    async with connection.transaction():
+        await connection.execute(f"SET LOCAL statement_timeout = {int(timeout * 1000)}", timeout=timeout)
+        await connection.execute("SELECT pg_advisory_xact_lock($1)", IMPORT_LOCK_KEY, timeout=timeout)
+
+        await _set_progress(job.id, status="copying", started_at=datetime.utcnow())
+        # Text columns, so a malformed value becomes a row error instead of failing the COPY
+        await connection.execute(
+            f"CREATE TEMP TABLE {STAGE_TABLE} (line_no bigint GENERATED ALWAYS AS IDENTITY, "
+            f"{', '.join(f'{name} text' for name in header)}) ON COMMIT DROP",
+            timeout=timeout,
+        )
+        copied = await connection.copy_to_table(
+            STAGE_TABLE, source=path, columns=header, format="csv", header=True, timeout=timeout
+        )
+        total_rows = int(copied.split()[-1])
+
+        await _set_progress(job.id, status="validating", total_rows=total_rows)
+        await connection.execute(_validation_sql(job, header), job.id, timeout=timeout)
+        error_rows = await connection.fetchval(
+            "SELECT count(DISTINCT row_number) FROM import_job_errors WHERE job_id = $1",
+            job.id,
+            timeout=timeout,
+        )
+        if error_rows and job.atomic:
+            # Commit the error report alone
+            return {
+                "status": "failed",
+                "error_rows": error_rows,
+                "inserted_rows": 0,
+                "updated_rows": 0,
+                "message": f"{error_rows} rows have errors, so nothing was imported",
+            }
+
+        await _set_progress(job.id, status="merging", error_rows=error_rows)
+        sql, args = _merge_sql(job, header)
+        inserted, updated = await connection.fetchrow(sql, *args, timeout=timeout)
+    return {"status": "succeeded", "inserted_rows": inserted, "updated_rows": updated}
+
+
+def _error_message(e: Exception) -> str:
+    message = (str(e).strip().splitlines() or [type(e).__name__])[0]
+    # asyncpg reports where a COPY failed (e.g. "COPY import_stage, line 12") as the context
+    context = getattr(e, "context", None)
+    return f"{message} ({context})" if context else message
+
+
+async def run_import(job_id: int, path: str) -> None:
+    """Background task: load an uploaded file for its import job, then delete the file."""
+    try:
+        async with async_session_factory() as db:
+            job = await crud_import_job.get(db, id=job_id)
+        header = read_header(path)
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            result = await _load(raw.driver_connection, job, header, path)
+        if job.kind == "vines":
+            crud_vine.invalidate_caches()
+        else:
+            stats_refresher.mark_stale("activities" if job.kind == "maintenance" else "issues")
+        await _set_progress(job_id, finished_at=datetime.utcnow(), **result)
+        logger.info(f"Import job {job_id} ({job.kind}) finished: {result}")
+    except Exception as e:
+        logger.exception(f"Import job {job_id} failed")
+        await _set_progress(
+            job_id, status="failed", message=_error_message(e), finished_at=datetime.utcnow()
+        )
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,127 @@
+"""
+Compact in-memory map of one field: which vine stands at each (row, spot).
+
+Each row is a contiguous run of spots starting at `first_spot`, held as an
+array of vine ids (0 for an empty spot) and two bitmaps, one bit per spot,
+for alive and dead vines. A 20,000-vine block takes about 90 KB this way.
+"""
+import base64
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Spots outside 1..MAX_SPOT are reported as unplaced rather than stretching a row's arrays
+MAX_SPOT = 10_000
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+class FieldRow:
+    __slots__ = ("first_spot", "ids", "alive", "dead")
+
+    def __init__(self, first_spot: int, length: int):
+        self.first_spot = first_spot
+        self.ids = array("I", bytes(4 * length))
+        self.alive = bytearray((length + 7) // 8)
+        self.dead = bytearray((length + 7) // 8)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def place(self, spot: int, vine_id: int, is_dead: bool) -> None:
+        index = spot - self.first_spot
+        self.ids[index] = vine_id
+        bitmap = self.dead if is_dead else self.alive
+        bitmap[index >> 3] |= 1 << (index & 7)
+
+    def vine_at(self, spot: int) -> Optional[int]:
+        index = spot - self.first_spot
+        if 0 <= index < len(self.ids) and self.ids[index]:
+            return self.ids[index]
+        return None
+
+    def encode(self) -> Dict[str, Any]:
+        ids = self.ids
+        if sys.byteorder != "little":
+            ids = array("I", ids)
+            ids.byteswap()
+        return {
+            "first_spot": self.first_spot,
+            "length": len(self.ids),
+            "ids": _b64(ids.tobytes()),
+            "alive": _b64(bytes(self.alive)),
+            "dead": _b64(bytes(self.dead)),
+        }
+
+
+class FieldLayout:
+    def __init__(self, field_name: str, version: str):
+        self.field_name = field_name
+        # Fingerprint of the vines the layout was built from; also used as its ETag
+        self.version = version
+        self.rows: Dict[int, FieldRow] = {}
+        # Extra vines recorded at an already occupied spot, by (row, spot)
+        self.conflicts: Dict[Tuple[int, int], List[int]] = {}
+        # Vines in the field without a usable row and spot
+        self.unplaced: List[int] = []
+        self.vine_count = 0
+        self.dead_count = 0
+
+    @classmethod
+    def build(
+        cls,
+        field_name: str,
+        version: str,
+        vines: Iterable[Tuple[int, Optional[int], Optional[int], bool]],
+    ) -> "FieldLayout":
+        """Build from (vine id, row number, spot number, is_dead) tuples, ordered by id."""
+        layout = cls(field_name, version)
+        by_row: Dict[int, List[Tuple[int, int, bool]]] = {}
+        for vine_id, row_number, spot_number, is_dead in vines:
+            layout.vine_count += 1
+            layout.dead_count += bool(is_dead)
+            if row_number is None or spot_number is None or not 1 <= spot_number <= MAX_SPOT:
+                layout.unplaced.append(vine_id)
+            else:
+                by_row.setdefault(row_number, []).append((spot_number, vine_id, bool(is_dead)))
+
+        for row_number in sorted(by_row):
+            spots = by_row[row_number]
+            first_spot = min(spot for spot, _, _ in spots)
+            last_spot = max(spot for spot, _, _ in spots)
+            row = layout.rows[row_number] = FieldRow(first_spot, last_spot - first_spot + 1)
+            for spot, vine_id, is_dead in spots:
+                if row.vine_at(spot) is None:
+                    row.place(spot, vine_id, is_dead)
+                else:
+                    layout.conflicts.setdefault((row_number, spot), [row.vine_at(spot)]).append(vine_id)
+        return layout
+
+    def lookup(self, row_number: int, spot_number: int) -> List[int]:
+        """Ids of the vines at a location; more than one only where the data conflicts."""
+        if (row_number, spot_number) in self.conflicts:
+            return list(self.conflicts[(row_number, spot_number)])
+        row = self.rows.get(row_number)
+        vine_id = row.vine_at(spot_number) if row else None
+        return [vine_id] if vine_id else []
+
+    def encode(self) -> Dict[str, Any]:
+        """
+        The layout as a JSON-ready dict. `ids` are little-endian uint32 arrays
+        and `alive`/`dead` bitmaps (bit i & 7 of byte i >> 3 is the spot
+        first_spot + i), all base64 encoded.
+        """
+        return {
+            "field_name": self.field_name,
+            "version": self.version,
+            "vine_count": self.vine_count,
+            "dead_count": self.dead_count,
+            "rows": [{"row": number, **row.encode()} for number, row in self.rows.items()],
+            "conflicts": [
+                {"row": row_number, "spot": spot, "ids": ids}
+                for (row_number, spot), ids in self.conflicts.items()
+            ],
+            "unplaced": self.unplaced,
+        }
@@ -1,13 +1,21 @@
+import asyncio
 import base64
+import hashlib
 import os
-import uuid
-from datetime import datetime
-from typing import Optional, Tuple, Dict, List
+import tempfile
+import time
+from email.utils import parsedate_to_datetime
+from typing import BinaryIO, NamedTuple, Optional, Tuple, Dict, List, Union
 import magic
-from PIL import Image, UnidentifiedImageError
+from PIL import Image, ImageOps, UnidentifiedImageError
 from fastapi import HTTPException, UploadFile
 import logging
 from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.core.workers import WorkerPool
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -15,8 +23,18 @@ logger = logging.getLogger(__name__)
 # Define base directory for uploads
 UPLOAD_DIR = Path("/app/app/static/uploads/images")
 
+# Uploads are streamed here and renamed into place once valid; it is on the same
+# volume as UPLOAD_DIR, so the rename is atomic
+INCOMING_DIR = UPLOAD_DIR / ".incoming"
+
+# Photos are stored once per distinct content, named by their SHA-256 under two levels
+# of hash prefix (cas/ab/cd/abcd...ef.jpg) so no directory grows too large. Issues
+# share a file by sharing its photo_path; see crud_issue.issue.release_photo
+CAS_DIR = "cas"
+
 # Ensure the upload directory exists
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+INCOMING_DIR.mkdir(parents=True, exist_ok=True)
 
 # Define allowed mime types for images
 ALLOWED_IMAGE_TYPES = {
@@ -32,20 +50,78 @@ ALLOWED_IMAGE_TYPES = {
 # Define a max file size (5MB)
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
 
+# Downscaled copies of each photo, by ?size= name: the longest edge in pixels.
+# They are JPEGs stored under UPLOAD_DIR/variants/<size>/<photo path>.jpg
+PHOTO_VARIANTS = {
+    "thumb": settings.PHOTO_THUMB_MAX_EDGE,
+    "medium": settings.PHOTO_MEDIUM_MAX_EDGE,
+}
+
+# Decoding and resizing a photo takes tens to hundreds of milliseconds of CPU,
+# so it runs in its own processes, never on the event loop
+photo_pool = WorkerPool(
+    "photo_variants",
+    max_workers=settings.PHOTO_VARIANT_WORKERS,
+    max_pending=settings.PHOTO_VARIANT_MAX_PENDING,
+)
+
+# Upload validation and storage are blocking calls (libmagic, Pillow, file I/O), so
+# they run here rather than on the event loop. Threads, because the work is short
+# once only the header is read, and a process pool would copy every upload
+image_pool = WorkerPool(
+    "image_uploads",
+    max_workers=settings.IMAGE_UPLOAD_WORKERS,
+    max_pending=settings.IMAGE_UPLOAD_MAX_PENDING,
+    use_processes=False,
+)
+
+# libmagic identifies every allowed type from the start of the file
+MAGIC_HEADER_BYTES = 8192
+
+# Uploads are read and written this much at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class StoredImage(NamedTuple):
+    full_path: str
+    relative_path: str
+    content_type: str
+    size: int
+    sha256: str
+    # The same bytes were already stored, so nothing new was written
+    deduplicated: bool = False
+
+# Variants being generated in this process, so concurrent requests share one job
+_variant_jobs: Dict[Tuple[str, str], "asyncio.Future[bool]"] = {}
+
 
 def validate_image_file(file_content: bytes, content_type: Optional[str] = None) -> Tuple[str, str]:
     """
     Validate that the given file content is a valid image.
     Returns the detected mime type and appropriate file extension.
     Raises HTTPException if the file is not a valid image.
+    Only the header is examined; this blocks, so call it from image_pool.
+    """
+    from io import BytesIO
+    return _validate_image(
+        file_content[:MAGIC_HEADER_BYTES], BytesIO(file_content), len(file_content), content_type
+    )
+
+
+def _validate_image(
+    header: bytes,
+    source: Union[str, BinaryIO],
+    file_size: int,
+    content_type: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    validate_image_file for an image that may be on disk: `header` is its
+    first MAGIC_HEADER_BYTES and `source` a path or file object for Pillow.
     """
-    if not file_content:
+    if not file_size:
         logger.error("Empty file content provided")
         raise HTTPException(status_code=400, detail="Empty file content")
 
-    file_size = len(file_content)
-    logger.info(f"Validating image file of size: {file_size} bytes")
-    
     if file_size > MAX_FILE_SIZE:
         logger.error(f"File size {file_size} exceeds maximum size of {MAX_FILE_SIZE}")
         raise HTTPException(
@@ -55,8 +131,7 @@ def validate_image_file(file_content: bytes, content_type: Optional[str] = None)
 
     # Use python-magic to detect the file type
     try:
-        detected_type = magic.from_buffer(file_content, mime=True)
-        logger.info(f"Detected file type using magic: {detected_type}")
+        detected_type = magic.from_buffer(header, mime=True)
     except Exception as e:
         logger.error(f"Error detecting file type with magic: {e}")
         # Check if content_type is provided and use that as a fallback
@@ -74,20 +149,10 @@ def validate_image_file(file_content: bytes, content_type: Optional[str] = None)
         else:
             raise HTTPException(status_code=400, detail="Could not detect file type and no content type provided")
 
-    logger.info(f"Detected file type: {detected_type}, provided content type: {content_type}")
-
     # Check if the detected type is allowed
     if detected_type not in ALLOWED_IMAGE_TYPES:
         valid_types = ", ".join(ALLOWED_IMAGE_TYPES.keys())
-        logger.error(f"Unsupported file type: {detected_type}. Allowed types: {valid_types}")
-        
-        # Dump the first few bytes for debugging
-        try:
-            hex_dump = ' '.join([f'{b:02x}' for b in file_content[:50]])
-            logger.info(f"File starts with bytes: {hex_dump}")
-        except Exception as e:
-            logger.error(f"Error creating hex dump: {e}")
-            
+        logger.warning(f"Unsupported file type: {detected_type}. Allowed types: {valid_types}")
         raise HTTPException(
             status_code=400, 
             detail=f"Unsupported file type: {detected_type}. Allowed types: {valid_types}"
@@ -95,14 +160,14 @@ def validate_image_file(file_content: bytes, content_type: Optional[str] = None)
 
     # Get the appropriate extension for the file type
     extension = ALLOWED_IMAGE_TYPES[detected_type][0]
-    logger.info(f"Using file extension: {extension}")
 
-    # Try to open the image with Pillow to verify it's a valid image
+    # Pillow parses just the header here (format and dimensions, and its decompression
+    # bomb limit); the pixels are only decoded when the variants are made
     try:
-        from io import BytesIO
-        img = Image.open(BytesIO(file_content))
-        img.verify()  # Verify it's a valid image
-        logger.info(f"Image verified successfully with Pillow")
+        with Image.open(source) as img:
+            width, height = img.size
+        if not width or not height:
+            raise ValueError("image has no pixels")
     except UnidentifiedImageError:
         logger.error("Image could not be identified by Pillow")
         raise HTTPException(status_code=400, detail="Invalid image format")
@@ -113,41 +178,91 @@ def validate_image_file(file_content: bytes, content_type: Optional[str] = None)
     return detected_type, extension
 
 
-async def save_uploaded_image(file_content: bytes, content_type: Optional[str] = None) -> Tuple[str, str, str]:
+def content_path(sha256: str, extension: str) -> Path:
+    """Relative path (under UPLOAD_DIR) of the stored photo with this SHA-256."""
+    return Path(CAS_DIR) / sha256[:2] / sha256[2:4] / f"{sha256}{extension}"
+
+
+def is_content_path(relative_path: str) -> bool:
+    return Path(relative_path).parts[:1] == (CAS_DIR,)
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _claim_existing(file_path: Path) -> bool:
     """
-    Save uploaded image to the filesystem.
-    Returns the saved file path, filename, and detected content type.
+    Whether the content store already has this file. If so its modification
+    time is bumped, which keeps remove_stored_photo from collecting it before
+    the issue that now refers to it is committed.
     """
+    try:
+        os.utime(file_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _adopt_file(tmp_path: str, file_path: Path) -> bool:
+    """
+    Rename a fully written file to its content path, or drop it when the same
+    content is already stored. Returns whether it was a duplicate.
+    """
+    if _claim_existing(file_path):
+        discard_file(tmp_path)
+        return True
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    # Two identical uploads may both get here; the rename is atomic and the bytes are equal
+    os.replace(tmp_path, file_path)
+    return False
+
+
+def _store_image(file_content: bytes, content_type: Optional[str] = None) -> Tuple[str, str, str]:
+    """Validate and write an image; runs in image_pool."""
     # Validate the image
     mime_type, extension = validate_image_file(file_content, content_type)
+    relative_path = content_path(hashlib.sha256(file_content).hexdigest(), extension)
+    file_path = UPLOAD_DIR / relative_path
 
-    # Generate a unique filename
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
-    filename = f"issue_{timestamp}_{unique_id}{extension}"
-    
-    # Create a directory structure based on year/month
-    year_month = datetime.utcnow().strftime("%Y/%m")
-    relative_directory = Path(year_month)
-    absolute_directory = UPLOAD_DIR / relative_directory
-    absolute_directory.mkdir(parents=True, exist_ok=True)
-    
-    # Full path to the file
-    file_path = absolute_directory / filename
-    relative_path = relative_directory / filename
-    
-    # Save the file
+    # Save the file, unless it is already stored
+    if _claim_existing(file_path):
+        logger.info(f"Image already stored as {file_path}")
+        return str(file_path), str(relative_path), mime_type
     try:
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        fd, tmp_path = tempfile.mkstemp(dir=INCOMING_DIR, prefix="upload-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(file_content)
+            _adopt_file(tmp_path, file_path)
+        except BaseException:
+            discard_file(tmp_path)
+            raise
         logger.info(f"Saved image to {file_path}")
     except Exception as e:
         logger.error(f"Error saving file: {e}")
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
-    
+
     return str(file_path), str(relative_path), mime_type
 
 
+async def save_uploaded_image(file_content: bytes, content_type: Optional[str] = None) -> Tuple[str, str, str]:
+    """
+    Save uploaded image to the filesystem.
+    Returns the saved file path, filename, and detected content type.
+    """
+    file_path, relative_path, mime_type = await image_pool.run(_store_image, file_content, content_type)
+    
+    # Make the previews now so the first gallery view doesn't wait for them
+    await generate_photo_variants(relative_path)
+    
+    return file_path, relative_path, mime_type
+
+
 async def decode_base64_image(base64_string: str) -> bytes:
     """
     Decode a base64 encoded image.
@@ -179,40 +294,87 @@ async def decode_base64_image(base64_string: str) -> bytes:
         raise HTTPException(status_code=400, detail=f"Invalid base64 encoded image: {str(e)}")
 
 
+def _write_chunk(out: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+    # hashlib releases the GIL on large buffers, so this doesn't hold up the loop either
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _publish_upload(
+    tmp_path: str, header: bytes, size: int, content_type: Optional[str], sha256: str
+) -> Tuple[str, str, str, bool]:
+    """Validate a fully received upload and rename it into the content store; runs in image_pool."""
+    mime_type, extension = _validate_image(header, tmp_path, size, content_type)
+    relative_path = content_path(sha256, extension)
+    file_path = UPLOAD_DIR / relative_path
+    deduplicated = _adopt_file(tmp_path, file_path)
+    return str(file_path), str(relative_path), mime_type, deduplicated
+
+
+def discard_file(path: str) -> None:
+    """Delete a file if it exists."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def store_upload(upload_file: UploadFile) -> StoredImage:
+    """
+    Stream an upload to disk UPLOAD_CHUNK_SIZE bytes at a time, hashing it on
+    the way, and publish it under its content path with an atomic rename once
+    it is known to be a valid image. Only one chunk is held in memory, and
+    uploads over MAX_FILE_SIZE are abandoned as soon as they cross it. A photo
+    that is already stored is not written again.
+    """
+    fd, tmp_path = await image_pool.run(
+        tempfile.mkstemp, dir=INCOMING_DIR, prefix="upload-", suffix=".tmp"
+    )
+    digest = hashlib.sha256()
+    size = 0
+    header = b""
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File size exceeds the maximum allowed size of {MAX_FILE_SIZE // (1024 * 1024)}MB",
+                    )
+                if len(header) < MAGIC_HEADER_BYTES:
+                    header += chunk[:MAGIC_HEADER_BYTES - len(header)]
+                await image_pool.run(_write_chunk, out, digest, chunk)
+        sha256 = digest.hexdigest()
+        full_path, relative_path, mime_type, deduplicated = await image_pool.run(
+            _publish_upload, tmp_path, header, size, upload_file.content_type, sha256
+        )
+    except BaseException:
+        await image_pool.run(discard_file, tmp_path)
+        raise
+
+    # Make the previews now so the first gallery view doesn't wait for them
+    # (a no-op for a duplicate, whose variants already exist)
+    await generate_photo_variants(relative_path)
+
+    logger.info(
+        f"Stored upload {upload_file.filename} as {relative_path} ({size} bytes"
+        f"{', already stored' if deduplicated else ''})"
+    )
+    return StoredImage(full_path, relative_path, mime_type, size, sha256, deduplicated)
+
+
 async def process_uploaded_file(upload_file: UploadFile) -> Tuple[str, str, str]:
     """
     Process an uploaded file from FastAPI's UploadFile.
+    Returns the saved file path, relative path, and detected content type.
     """
     try:
-        # Enhanced logging
-        logger.info(f"Processing file: {upload_file.filename}, content_type: {upload_file.content_type}")
-        
-        # Read the file content
-        contents = await upload_file.read()
-        logger.info(f"Read {len(contents)} bytes from uploaded file")
-        
-        if len(contents) == 0:
-            logger.error("File content is empty")
-            raise ValueError("Empty file content")
-            
-        # Add more debugging about the file contents
-        if len(contents) > 100:
-            logger.info(f"File content starts with: {contents[:100]}")
-            
-        # Verify content type
-        if not upload_file.content_type:
-            try:
-                import magic
-                detected_type = magic.from_buffer(contents, mime=True)
-                logger.info(f"Detected content type: {detected_type}")
-            except Exception as e:
-                logger.warning(f"Error detecting content type with magic: {e}")
-                
-        # Save the file
-        result = await save_uploaded_image(contents, upload_file.content_type)
-        logger.info(f"File saved successfully: {result[1]}")
-        return result
+        stored = await store_upload(upload_file)
+        return stored.full_path, stored.relative_path, stored.content_type
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing uploaded file: {e}")
         import traceback
@@ -231,4 +393,148 @@ def get_full_image_path(relative_path: str) -> str:
     """
     Get the full filesystem path from a relative path.
     """
-    return str(UPLOAD_DIR / relative_path)
\ No newline at end of file
+    return str(UPLOAD_DIR / relative_path)
+
+
+# Photo responses are private (they need a token). A URL carrying the photo's current
+# version never changes content, so it can be cached for good; other URLs revalidate
+PHOTO_CACHE_VERSIONED = f"private, max-age={settings.PHOTO_CACHE_MAX_AGE_SECONDS}, immutable"
+PHOTO_CACHE_REVALIDATE = "private, no-cache"
+
+
+def photo_etag(relative_path: str, stat_result: os.stat_result) -> str:
+    """
+    Strong ETag for a stored photo file. Files are never rewritten in place,
+    so the path, size and modification time identify the bytes; a content
+    store file is named by its hash, which stays put when a duplicate upload
+    bumps its modification time.
+    """
+    if is_content_path(relative_path):
+        return f'"{Path(relative_path).stem}"'
+    key = f"{relative_path}:{stat_result.st_size}:{stat_result.st_mtime_ns}"
+    return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def is_not_modified(request_headers: Headers, etag: str, last_modified: Optional[float] = None) -> bool:
+    """
+    Whether a conditional GET can be answered with 304 Not Modified.
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second precision
+        return int(last_modified) <= since
+    return False
+
+
+def get_variant_path(relative_path: str, size: str) -> str:
+    """
+    Relative path (under UPLOAD_DIR) of a photo's downscaled variant.
+    """
+    return str(Path("variants") / size / f"{relative_path}.jpg")
+
+
+def render_photo_variant(source: str, target: str, max_edge: int, quality: int) -> None:
+    """
+    Write a JPEG of `source` scaled to fit in max_edge x max_edge to `target`.
+    Runs in a photo_pool process; the file appears atomically, so readers
+    never see a partial image.
+    """
+    with Image.open(source) as img:
+        # Lets JPEG decode straight at a reduced scale
+        img.draft("RGB", (max_edge, max_edge))
+        # Phones record rotation in EXIF; apply it, since the EXIF is dropped
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_edge, max_edge))
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, "JPEG", quality=quality, optimize=True)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+async def _render_variant(relative_path: str, size: str) -> bool:
+    try:
+        await photo_pool.run(
+            render_photo_variant,
+            get_full_image_path(relative_path),
+            get_full_image_path(get_variant_path(relative_path, size)),
+            PHOTO_VARIANTS[size],
+            settings.PHOTO_VARIANT_QUALITY,
+        )
+        return True
+    except Exception as e:
+        # e.g. HEIC, which Pillow can't decode; the original is served instead
+        logger.warning(f"Could not make {size} variant of {relative_path}: {e}")
+        return False
+
+
+async def ensure_photo_variant(relative_path: str, size: str) -> Optional[str]:
+    """
+    Relative path of the `size` variant of a stored photo, generating it
+    first if it doesn't exist yet. None if it can't be made.
+    """
+    variant_path = get_variant_path(relative_path, size)
+    if await run_in_threadpool(os.path.exists, get_full_image_path(variant_path)):
+        return variant_path
+    key = (relative_path, size)
+    job = _variant_jobs.get(key)
+    if job is None:
+        job = _variant_jobs[key] = asyncio.ensure_future(_render_variant(relative_path, size))
+        job.add_done_callback(lambda _: _variant_jobs.pop(key, None))
+    # Shielded: one caller disconnecting mustn't cancel the job the others wait on
+    return variant_path if await asyncio.shield(job) else None
+
+
+async def generate_photo_variants(relative_path: str) -> None:
+    """Make every variant of a newly stored photo. Failures are logged, not raised."""
+    await asyncio.gather(*(ensure_photo_variant(relative_path, size) for size in PHOTO_VARIANTS))
+
+
+def delete_stored_photo(relative_path: str, grace_seconds: float) -> bool:
+    """
+    Delete a stored photo and its variants. This blocks; the API goes through
+    remove_stored_photo, which runs it in image_pool. Content store files
+    used within the last grace_seconds are kept (returns False), since an
+    upload of the same bytes may be about to refer to them again.
+    """
+    file_path = UPLOAD_DIR / relative_path
+    try:
+        if is_content_path(relative_path) and time.time() - file_path.stat().st_mtime < grace_seconds:
+            return False
+        file_path.unlink()
+    except FileNotFoundError:
+        pass
+    for size in PHOTO_VARIANTS:
+        discard_file(get_full_image_path(get_variant_path(relative_path, size)))
+    return True
+
+
+async def remove_stored_photo(relative_path: str) -> bool:
+    """
+    Delete a photo that no issue refers to any more. Failures are logged, not
+    raised; anything left behind is collected by `python -m app.rehome_photos --gc`.
+    """
+    try:
+        return await image_pool.run(
+            delete_stored_photo, relative_path, settings.PHOTO_GC_GRACE_SECONDS
+        )
+    except Exception as e:
+        logger.warning(f"Could not remove stored photo {relative_path}: {e}")
+        return False
@@ -0,0 +1,46 @@
+"""
+Shared harness for the before/after event loop benchmarks: run N calls
+concurrently while a ticker coroutine measures how late the loop wakes it
+up, which is the delay every other request would see.
+"""
+import asyncio
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+async def _ticker(lags: List[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def measure(call: Callable[[int], Awaitable[Any]], concurrency: int) -> Dict[str, float]:
+    """Await call(0) .. call(concurrency - 1) together; returns throughput and loop lag."""
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "calls_per_s": concurrency / elapsed,
+        "loop_lag_p50_ms": statistics.median(lags) * 1000 if lags else 0.0,
+        "loop_lag_max_ms": lags[-1] * 1000 if lags else elapsed * 1000,
+    }
+
+
+def report(label: str, concurrency: int, noun: str, result: Dict[str, float]) -> None:
+    print(
+        f"{label:16} {concurrency} {noun} in {result['elapsed_s']:.2f}s "
+        f"-> {result['calls_per_s']:.1f}/s, "
+        f"loop lag p50 {result['loop_lag_p50_ms']:.1f}ms max {result['loop_lag_max_ms']:.1f}ms"
+    )
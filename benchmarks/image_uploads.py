@@ -0,0 +1,64 @@
+"""
+Photo upload throughput with N concurrent uploads, before and after moving
+image validation off the event loop.
+
+"before" validates inline on the loop the way save_uploaded_image used to:
+libmagic over the whole buffer, then a Pillow verify(). "after" awaits the
+header-only validate_image_file in the image upload pool. While the uploads
+run, a ticker coroutine measures how late the loop wakes it up, which is the
+delay every other request would see. Nothing is written to disk.
+
+Run from the repository root (Settings are read from .env):
+
+    python -m benchmarks.image_uploads --concurrency 32 --format TIFF
+"""
+import argparse
+import asyncio
+import io
+
+import magic
+from PIL import Image
+
+from app.utils.image_utils import image_pool, validate_image_file
+from benchmarks._loop_lag import measure, report
+
+
+def _make_image(image_format: str, width: int, height: int) -> bytes:
+    # Noise, so compressed formats come out at a realistic size
+    img = Image.effect_noise((width, height), 64).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, image_format)
+    return buf.getvalue()
+
+
+async def _inline_upload(content: bytes) -> None:
+    magic.from_buffer(content, mime=True)
+    Image.open(io.BytesIO(content)).verify()
+
+
+async def _pooled_upload(content: bytes) -> None:
+    await image_pool.run(validate_image_file, content)
+
+
+async def main(concurrency: int, image_format: str, width: int, height: int) -> None:
+    content = _make_image(image_format, width, height)
+    print(f"{image_format} {width}x{height}, {len(content) / 1024 / 1024:.1f} MB per upload")
+
+    # Warm the pool so thread start-up isn't counted
+    await _pooled_upload(content)
+
+    for label, upload in (("before (inline)", _inline_upload), ("after (pool)", _pooled_upload)):
+        result = await measure(lambda _: upload(content), concurrency)
+        report(label, concurrency, "uploads", result)
+    print(f"pool: {image_pool.stats()}")
+    image_pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--format", dest="image_format", default="PNG", help="Pillow format name")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=900)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.image_format, args.width, args.height))
@@ -0,0 +1,43 @@
+"""
+Login throughput with N concurrent logins, before and after moving bcrypt
+off the event loop.
+
+"before" hashes inline on the loop, as CRUDUser.get_by_email used to on every
+lookup; "after" awaits the password hashing pool. While the logins run, a
+ticker coroutine measures how late the loop wakes it up, which is the delay
+every other request would see.
+
+Run from the repository root (Settings are read from .env):
+
+    python -m benchmarks.login_throughput --concurrency 32
+"""
+import argparse
+import asyncio
+
+from app.core.security import get_password_hash, get_password_hash_async, password_pool
+from benchmarks._loop_lag import measure, report
+
+
+async def _inline_login(password: str) -> str:
+    return get_password_hash(password)
+
+
+async def _pooled_login(password: str) -> str:
+    return await get_password_hash_async(password)
+
+
+async def main(concurrency: int) -> None:
+    # Warm the pool so process start-up isn't counted
+    await get_password_hash_async("warm-up")
+
+    for label, login in (("before (inline)", _inline_login), ("after (pool)", _pooled_login)):
+        result = await measure(lambda i: login(f"password-{i}"), concurrency)
+        report(label, concurrency, "logins", result)
+    password_pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
@@ -0,0 +1,131 @@
+"""
+CRUDVine.search latency on a synthetic vine table, with and without the
+pg_trgm GIN indexes.
+
+The table is built in a scratch schema (vine_search_bench) with
+generate_series, so nothing in the application's own tables is touched. The
+real search code runs against it through a session whose search_path points
+at the scratch schema. Each query is timed with the indexes dropped, and
+again after they are built and the table is analyzed.
+
+Needs PostgreSQL with the pg_trgm extension available (Settings are read
+from .env). Run from the repository root:
+
+    python -m benchmarks.vine_search --rows 1000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+import app.db.base  # noqa: F401  (registers every model so the mappers can configure)
+from app.core.config import settings
+from app.crud.crud_vine import vine as crud_vine
+from app.models.vine import Vine
+from app.schemas.vine import VineSearchParams
+
+SCHEMA = "vine_search_bench"
+
+POPULATE_SQL = """
+INSERT INTO vine_inventory (
+    alpha_numeric_id, year_of_planting, nursery, variety, rootstock,
+    vineyard_name, field_name, row_number, spot_number, is_dead,
+    record_created, updated_at
+)
+SELECT
+    'V' || lpad(n::text, 8, '0'),
+    1980 + n % 45,
+    (ARRAY['Sunridge', 'Duarte', 'Novavine', 'Inland Desert'])[1 + n % 4],
+    (ARRAY['Cabernet Sauvignon', 'Merlot', 'Pinot Noir', 'Chardonnay', 'Riesling',
+           'Syrah', 'Zinfandel', 'Sauvignon Blanc', 'Grenache', 'Tempranillo'])[1 + n % 10]
+        || ' clone ' || (n % 97),
+    (ARRAY['101-14', '3309C', 'SO4', '1103P', 'Freedom'])[1 + n % 5],
+    'Vineyard ' || (n % 50),
+    'Field ' || chr(65 + n % 26) || (n % 400),
+    1 + n % 200,
+    1 + n % 150,
+    n % 37 = 0,
+    now(),
+    now()
+FROM generate_series(1, :rows) AS n
+"""
+
+QUERIES: Dict[str, VineSearchParams] = {
+    "alpha id fragment": VineSearchParams(alpha_numeric_id="0042137"),
+    "variety, case-insensitive": VineSearchParams(variety="PINOT NOIR CLONE 42", case_sensitive=False),
+    "field name": VineSearchParams(field_name="Field Q123"),
+    "vineyard + variety": VineSearchParams(vineyard_name="Vineyard 17", variety="Syrah clone 5"),
+}
+
+
+async def _time_queries(session: AsyncSession, repeat: int) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    for label, params in QUERIES.items():
+        samples: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await crud_vine.search(session, params=params)
+            samples.append(time.perf_counter() - start)
+        timings[label] = statistics.median(samples) * 1000
+    return timings
+
+
+async def main(rows: int, repeat: int, keep: bool) -> None:
+    engine = create_async_engine(
+        str(settings.DATABASE_URL),
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    trigram_indexes = [index for index in Vine.__table__.indexes if index.name.endswith("_trgm")]
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Vine.__table__.create)
+        for index in trigram_indexes:
+            await conn.execute(DropIndex(index))
+
+        print(f"Populating {rows:,} vines...")
+        start = time.perf_counter()
+        await conn.execute(text(POPULATE_SQL), {"rows": rows})
+        await conn.execute(text("ANALYZE vine_inventory"))
+        print(f"  done in {time.perf_counter() - start:.1f}s")
+
+    try:
+        async with AsyncSession(engine) as session:
+            before = await _time_queries(session, repeat)
+
+        print("Building trigram indexes...")
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            for index in trigram_indexes:
+                await conn.execute(CreateIndex(index))
+            await conn.execute(text("ANALYZE vine_inventory"))
+        print(f"  done in {time.perf_counter() - start:.1f}s")
+
+        async with AsyncSession(engine) as session:
+            after = await _time_queries(session, repeat)
+
+        print(f"\nmedian of {repeat} runs (exact total), ms")
+        print(f"{'query':<28}{'seq scan':>12}{'trigram':>12}{'speed-up':>10}")
+        for label in QUERIES:
+            print(f"{label:<28}{before[label]:>12.1f}{after[label]:>12.1f}{before[label] / after[label]:>9.1f}x")
+    finally:
+        if not keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema afterwards")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat, args.keep))
@@ -0,0 +1,40 @@
+"""keyset pagination indexes
+
+Revision ID: 4c1e7a9b2d30
+Revises:
+Create Date: 2026-10-17 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e7a9b2d30'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns); b-trees are scanned backwards for the DESC listings
+INDEXES = [
+    ("ix_vine_issues_date_reported_issue_id", "vine_issues", ["date_reported", "issue_id"]),
+    ("ix_vine_issues_vine_id_date_reported", "vine_issues", ["vine_id", "date_reported", "issue_id"]),
+    ("ix_vine_issues_is_resolved_date_reported", "vine_issues", ["is_resolved", "date_reported", "issue_id"]),
+    ("ix_maintenance_activities_activity_date_activity_id", "maintenance_activities", ["activity_date", "activity_id"]),
+    ("ix_maintenance_activities_vine_id_activity_date", "maintenance_activities", ["vine_id", "activity_date", "activity_id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, but keeps the tables writable while indexing
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,48 @@
+"""vine search trigram indexes
+
+Revision ID: 8d2f5b6e1c47
+Revises: 4c1e7a9b2d30
+Create Date: 2026-10-17 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f5b6e1c47'
+down_revision = '4c1e7a9b2d30'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ["alpha_numeric_id", "variety", "vineyard_name", "field_name"]
+
+
+def upgrade() -> None:
+    # Needs CREATE privilege on the database; pg_trgm ships with PostgreSQL's contrib package
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # gin_trgm_ops serves LIKE and ILIKE '%term%' for terms of three or more characters
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.create_index(
+                f"ix_vine_inventory_{column}_trgm",
+                "vine_inventory",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.drop_index(
+                f"ix_vine_inventory_{column}_trgm",
+                table_name="vine_inventory",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    # The extension is left installed; other objects may depend on it
@@ -0,0 +1,123 @@
+"""stats views
+
+Revision ID: a9d4e2f7c315
+Revises: f3a6b1c8e274
+Create Date: 2026-10-18 01:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2f7c315'
+down_revision = 'f3a6b1c8e274'
+branch_labels = None
+depends_on = None
+
+
+# Group keys are COALESCEd because REFRESH ... CONCURRENTLY needs a unique
+# index, and a unique index never matches NULLs
+VIEWS = {
+    "stats_vines_by_variety": (
+        """
+        SELECT COALESCE(variety, '') AS variety,
+               count(*) AS total,
+               count(*) FILTER (WHERE is_dead) AS dead
+        FROM vine_inventory
+        GROUP BY 1
+        """,
+        ["variety"],
+    ),
+    "stats_vines_by_rootstock": (
+        """
+        SELECT COALESCE(rootstock, '') AS rootstock,
+               count(*) AS total,
+               count(*) FILTER (WHERE is_dead) AS dead
+        FROM vine_inventory
+        GROUP BY 1
+        """,
+        ["rootstock"],
+    ),
+    "stats_vines_by_field": (
+        """
+        SELECT COALESCE(vineyard_name, '') AS vineyard_name,
+               COALESCE(field_name, '') AS field_name,
+               count(*) AS total,
+               count(*) FILTER (WHERE is_dead) AS dead
+        FROM vine_inventory
+        GROUP BY 1, 2
+        """,
+        ["vineyard_name", "field_name"],
+    ),
+    "stats_vines_by_planting_year": (
+        """
+        SELECT COALESCE(year_of_planting, 0) AS year_of_planting,
+               count(*) AS total,
+               count(*) FILTER (WHERE is_dead) AS dead
+        FROM vine_inventory
+        GROUP BY 1
+        """,
+        ["year_of_planting"],
+    ),
+    "stats_deaths_by_month": (
+        """
+        SELECT date_trunc('month', date_died) AS month,
+               count(*) AS deaths
+        FROM vine_inventory
+        WHERE date_died IS NOT NULL
+        GROUP BY 1
+        """,
+        ["month"],
+    ),
+    "stats_open_issues_by_field": (
+        """
+        SELECT COALESCE(v.vineyard_name, '') AS vineyard_name,
+               COALESCE(v.field_name, '') AS field_name,
+               count(*) AS open_issues,
+               count(DISTINCT i.vine_id) AS vines_affected
+        FROM vine_issues i
+        JOIN vine_inventory v ON v.vine_id = i.vine_id
+        WHERE NOT i.is_resolved
+        GROUP BY 1, 2
+        """,
+        ["vineyard_name", "field_name"],
+    ),
+    "stats_activities_by_type_month": (
+        """
+        SELECT a.type_id,
+               t.type_name,
+               date_trunc('month', a.activity_date) AS month,
+               count(*) AS activities
+        FROM maintenance_activities a
+        JOIN maintenance_types t ON t.type_id = a.type_id
+        GROUP BY 1, 2, 3
+        """,
+        ["type_id", "month"],
+    ),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stats_refreshes",
+        sa.Column("view_name", sa.String(), nullable=False),
+        sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("view_name"),
+    )
+    for name, (query, keys) in VIEWS.items():
+        op.execute(f"CREATE MATERIALIZED VIEW {name} AS {query.strip()}")
+        op.create_index(f"ux_{name}", name, keys, unique=True)
+    # The views were populated just now
+    op.execute(
+        "INSERT INTO stats_refreshes (view_name, refreshed_at) "
+        "SELECT unnest(ARRAY[{}]), now() AT TIME ZONE 'utc'".format(
+            ", ".join(f"'{name}'" for name in VIEWS)
+        )
+    )
+
+
+def downgrade() -> None:
+    for name in reversed(list(VIEWS)):
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {name}")
+    op.drop_table("stats_refreshes")
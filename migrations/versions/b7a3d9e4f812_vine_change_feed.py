@@ -0,0 +1,109 @@
+"""vine change feed
+
+Revision ID: b7a3d9e4f812
+Revises: 8d2f5b6e1c47
+Create Date: 2026-10-17 22:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7a3d9e4f812'
+down_revision = '8d2f5b6e1c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The feed is ordered by the id of the transaction that wrote each row rather than
+    # by updated_at, which is stamped before a commit that may come much later.
+    # Existing rows get 0; every client downloads them on its first sync anyway
+    op.add_column(
+        "vine_inventory",
+        sa.Column("change_xid", sa.BigInteger(), server_default="0", nullable=False),
+    )
+    op.create_table(
+        "vine_deletions",
+        sa.Column("deletion_id", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column("vine_id", sa.Integer(), nullable=False),
+        sa.Column("alpha_numeric_id", sa.String(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.Column("change_xid", sa.BigInteger(), server_default="0", nullable=False),
+    )
+    op.create_index(
+        "ix_vine_deletions_change_xid_deletion_id", "vine_deletions", ["change_xid", "deletion_id"]
+    )
+
+    # Stamped by triggers, so every write path (the API, batch sync, imports, psql) is covered.
+    # pg_current_xact_id() is the 64-bit top-level transaction id, which doesn't wrap around
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION stamp_vine_change_xid() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_xid := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER vine_inventory_stamp_change_xid
+        BEFORE INSERT OR UPDATE ON vine_inventory
+        FOR EACH ROW EXECUTE FUNCTION stamp_vine_change_xid()
+        """
+    )
+
+    # Log every delete, whichever code path or tool issues it. clock_timestamp() rather
+    # than now(), which would be the (possibly much earlier) start of the transaction
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION log_vine_deletion() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO vine_deletions (vine_id, alpha_numeric_id, deleted_at, change_xid)
+            VALUES (
+                OLD.vine_id,
+                OLD.alpha_numeric_id,
+                clock_timestamp() AT TIME ZONE 'utc',
+                pg_current_xact_id()::text::bigint
+            );
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER vine_inventory_log_deletion
+        AFTER DELETE ON vine_inventory
+        FOR EACH ROW EXECUTE FUNCTION log_vine_deletion()
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_vine_inventory_change_xid_vine_id",
+            "vine_inventory",
+            ["change_xid", "vine_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_vine_inventory_change_xid_vine_id",
+            table_name="vine_inventory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.execute("DROP TRIGGER IF EXISTS vine_inventory_log_deletion ON vine_inventory")
+    op.execute("DROP FUNCTION IF EXISTS log_vine_deletion()")
+    op.execute("DROP TRIGGER IF EXISTS vine_inventory_stamp_change_xid ON vine_inventory")
+    op.execute("DROP FUNCTION IF EXISTS stamp_vine_change_xid()")
+    op.drop_index("ix_vine_deletions_change_xid_deletion_id", table_name="vine_deletions")
+    op.drop_table("vine_deletions")
+    op.drop_column("vine_inventory", "change_xid")
@@ -0,0 +1,39 @@
+"""issue photo path index
+
+Revision ID: c4e8a2d6f931
+Revises: a9d4e2f7c315
+Create Date: 2026-10-18 03:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2d6f931'
+down_revision = 'a9d4e2f7c315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Issues share content-addressed photo files; this counts the references to one
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_vine_issues_photo_path",
+            "vine_issues",
+            ["photo_path"],
+            postgresql_where=sa.text("photo_path IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_vine_issues_photo_path",
+            table_name="vine_issues",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,76 @@
+"""import jobs
+
+Revision ID: e5c81f0a9d62
+Revises: b7a3d9e4f812
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c81f0a9d62'
+down_revision = 'b7a3d9e4f812'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_jobs",
+        sa.Column("job_id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("on_conflict", sa.String(), nullable=False),
+        sa.Column("atomic", sa.Boolean(), nullable=False),
+        sa.Column("total_rows", sa.Integer(), nullable=True),
+        sa.Column("error_rows", sa.Integer(), nullable=True),
+        sa.Column("inserted_rows", sa.Integer(), nullable=True),
+        sa.Column("updated_rows", sa.Integer(), nullable=True),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.user_id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_import_jobs_job_id", "import_jobs", ["job_id"])
+    op.create_table(
+        "import_job_errors",
+        sa.Column("error_id", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column(
+            "job_id",
+            sa.Integer(),
+            sa.ForeignKey("import_jobs.job_id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("row_number", sa.Integer(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+    )
+    op.create_index(
+        "ix_import_job_errors_job_id_row_number", "import_job_errors", ["job_id", "row_number"]
+    )
+
+    # PostgreSQL 14 has no pg_input_is_valid(); imports use this to flag unparseable
+    # dates as row errors instead of failing the whole statement
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION import_try_timestamp(value text) RETURNS timestamp AS $$
+        BEGIN
+            RETURN value::timestamp;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql STABLE
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS import_try_timestamp(text)")
+    op.drop_index("ix_import_job_errors_job_id_row_number", table_name="import_job_errors")
+    op.drop_table("import_job_errors")
+    op.drop_index("ix_import_jobs_job_id", table_name="import_jobs")
+    op.drop_table("import_jobs")
@@ -0,0 +1,40 @@
+"""vine location index
+
+Revision ID: f3a6b1c8e274
+Revises: e5c81f0a9d62
+Create Date: 2026-10-18 00:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a6b1c8e274'
+down_revision = 'e5c81f0a9d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves location lookups, and covers field layout grids and their version checks
+    # (count and sum of change_xid), so both of those are index-only
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_vine_inventory_field_location",
+            "vine_inventory",
+            ["field_name", "row_number", "spot_number"],
+            postgresql_include=["vine_id", "is_dead", "change_xid"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_vine_inventory_field_location",
+            table_name="vine_inventory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,111 @@
+import base64
+import sys
+from array import array
+
+from app.utils.field_layout import MAX_SPOT, FieldLayout
+
+VINES = [
+    # (vine id, row, spot, is_dead)
+    (1, 1, 3, False),
+    (2, 1, 7, True),
+    (3, 1, 5, False),
+    (4, 2, 1, False),
+    # A second vine recorded at row 1, spot 5
+    (5, 1, 5, True),
+    (6, None, 4, False),
+    (7, 3, None, False),
+    (8, 3, 0, False),
+    (9, 3, MAX_SPOT + 1, True),
+]
+
+
+def _layout() -> FieldLayout:
+    return FieldLayout.build("north", "v1", VINES)
+
+
+def _ids(encoded_row) -> list:
+    ids = array("I")
+    ids.frombytes(base64.b64decode(encoded_row["ids"]))
+    if sys.byteorder != "little":
+        ids.byteswap()
+    return list(ids)
+
+
+def _bits(encoded_row, name: str) -> list:
+    bitmap = base64.b64decode(encoded_row[name])
+    return [bool(bitmap[i >> 3] >> (i & 7) & 1) for i in range(encoded_row["length"])]
+
+
+def test_counts():
+    layout = _layout()
+    assert layout.vine_count == 9
+    assert layout.dead_count == 3
+
+
+def test_rows_span_first_to_last_spot():
+    layout = _layout()
+    assert sorted(layout.rows) == [1, 2]
+    assert (layout.rows[1].first_spot, len(layout.rows[1])) == (3, 5)
+    assert (layout.rows[2].first_spot, len(layout.rows[2])) == (1, 1)
+
+
+def test_unplaced_vines():
+    # No row, no spot, or a spot outside 1..MAX_SPOT
+    assert _layout().unplaced == [6, 7, 8, 9]
+
+
+def test_lookup():
+    layout = _layout()
+    assert layout.lookup(1, 3) == [1]
+    assert layout.lookup(1, 7) == [2]
+    assert layout.lookup(2, 1) == [4]
+    # Empty spot inside the row, spots outside it, and a row with no placed vines
+    assert layout.lookup(1, 4) == []
+    assert layout.lookup(1, 2) == []
+    assert layout.lookup(1, 8) == []
+    assert layout.lookup(3, 1) == []
+
+
+def test_conflicts_keep_every_vine_at_the_spot():
+    layout = _layout()
+    assert layout.conflicts == {(1, 5): [3, 5]}
+    assert layout.lookup(1, 5) == [3, 5]
+    # The first vine (by id) holds the grid cell
+    assert layout.rows[1].vine_at(5) == 3
+
+
+def test_encode_round_trip():
+    encoded = _layout().encode()
+    assert encoded["field_name"] == "north"
+    assert encoded["version"] == "v1"
+    assert (encoded["vine_count"], encoded["dead_count"]) == (9, 3)
+    assert encoded["conflicts"] == [{"row": 1, "spot": 5, "ids": [3, 5]}]
+    assert encoded["unplaced"] == [6, 7, 8, 9]
+
+    row1, row2 = encoded["rows"]
+    assert (row1["row"], row1["first_spot"], row1["length"]) == (1, 3, 5)
+    assert _ids(row1) == [1, 0, 3, 0, 2]
+    assert _bits(row1, "alive") == [True, False, True, False, False]
+    assert _bits(row1, "dead") == [False, False, False, False, True]
+    assert (row2["row"], row2["first_spot"], row2["length"]) == (2, 1, 1)
+    assert _ids(row2) == [4]
+    assert _bits(row2, "alive") == [True]
+
+
+def test_ids_are_little_endian():
+    encoded = FieldLayout.build("south", "v1", [(0x01020304, 1, 1, False)]).encode()
+    assert base64.b64decode(encoded["rows"][0]["ids"]) == bytes([4, 3, 2, 1])
+
+
+def test_bitmaps_span_several_bytes():
+    vines = [(spot, 1, spot, spot % 3 == 0) for spot in range(1, 20)]
+    row = FieldLayout.build("east", "v1", vines).encode()["rows"][0]
+    assert row["length"] == 19
+    assert len(base64.b64decode(row["alive"])) == 3
+    assert _bits(row, "dead") == [spot % 3 == 0 for spot in range(1, 20)]
+    assert _bits(row, "alive") == [spot % 3 != 0 for spot in range(1, 20)]
+
+
+def test_empty_field():
+    encoded = FieldLayout.build("west", "v0", []).encode()
+    assert encoded["rows"] == [] and encoded["unplaced"] == [] and encoded["vine_count"] == 0
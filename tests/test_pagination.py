@@ -0,0 +1,83 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import declarative_base
+
+from app.crud.pagination import InvalidCursor, Keyset, decode_cursor, encode_cursor
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip():
+    payload = {"k": "items", "v": [3, "x"]}
+    cursor = encode_cursor(payload)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == payload
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor({"k": "items"})[:-2], "WzFd"])
+def test_malformed_cursor_is_rejected(cursor):
+    # "WzFd" is valid base64 JSON, but a list rather than a payload
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_keyset_encode_decode_converts_datetimes():
+    keyset = Keyset("items_by_date", Item.created_at, Item.id, descending=True)
+    row = SimpleNamespace(created_at=datetime(2026, 10, 17, 12, 30, 5, 123), id=42)
+    assert keyset.decode(keyset.encode(row)) == [datetime(2026, 10, 17, 12, 30, 5, 123), 42]
+
+
+def test_keyset_rejects_cursor_from_another_listing():
+    row = SimpleNamespace(id=7)
+    cursor = Keyset("items", Item.id).encode(row)
+    with pytest.raises(InvalidCursor):
+        Keyset("other", Item.id).decode(cursor)
+
+
+@pytest.mark.parametrize("values", [None, [1], [1, 2, 3], ["not a date", 1]])
+def test_keyset_rejects_bad_values(values):
+    keyset = Keyset("items_by_date", Item.created_at, Item.id)
+    with pytest.raises(InvalidCursor):
+        keyset.parse_values(values)
+
+
+def test_seek_orders_and_filters_on_the_whole_key():
+    keyset = Keyset("items_by_date", Item.created_at, Item.id)
+    sql = _sql(keyset.seek(select(Item), [datetime(2026, 1, 1), 5]))
+    assert "(items.created_at, items.id) >" in sql
+    assert "ORDER BY items.created_at ASC, items.id ASC" in sql
+
+
+def test_seek_descending_single_column():
+    sql = _sql(Keyset("items", Item.id, descending=True).seek(select(Item), [5]))
+    assert "items.id <" in sql
+    assert "ORDER BY items.id DESC" in sql
+
+
+def test_apply_without_cursor_only_orders():
+    sql = _sql(Keyset("items", Item.id).apply(select(Item), None))
+    assert "WHERE" not in sql
+    assert "ORDER BY items.id ASC" in sql
+
+
+def test_next_cursor_only_for_full_pages():
+    keyset = Keyset("items", Item.id)
+    rows = [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+    assert keyset.next_cursor(rows, limit=3) is None
+    assert keyset.next_cursor([], limit=3) is None
+    assert keyset.decode(keyset.next_cursor(rows, limit=2)) == [2]